@@ -107,6 +107,11 @@ class UpdatersField(ReadOnlyField):
         ]
 
 
+class AssignedUsersField(UpdatersField):
+    def get_attribute(self, obj):
+        return obj.assigned_users.all()
+
+
 class TopicAssignmentField(HyperlinkedRelatedField):
     default_error_messages = {
         'outside_project': 'Related topics must be within the same project.',
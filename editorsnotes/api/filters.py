@@ -1,6 +1,10 @@
+from datetime import datetime, timedelta
+
 from django.conf import settings
+from django.utils.dateparse import parse_date, parse_datetime
 
-from elasticsearch_dsl import Q
+from elasticsearch_dsl import F, Q
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import BaseFilterBackend
 
 from editorsnotes.search.utils import clean_query_string, make_dummy_request
@@ -32,21 +36,108 @@ class ProjectFilterBackend(object):
         return search.filter('term', **{'serialized.project': project_url})
 
 
-class UpdaterFilterBackend(object):
+class TermFilterBackend(object):
+    """
+    Filter searches on the exact value of a not_analyzed field, given in the
+    `query_param` parameter. If the parameter is repeated, hits must match
+    every value.
+
+    Term filters are cached by Elasticsearch, so repeated filtering on the
+    same value is cheap.
     """
-    Filter searches based on updater in params
+    query_param = None
+    field = None
+
+    def get_value(self, value):
+        return value
+
+    def filter_search(self, request, search, view):
+        for value in request.query_params.getlist(self.query_param):
+            search = search.filter('term', **{
+                self.field: self.get_value(value)
+            })
+        return search
+
+
+class UpdaterFilterBackend(TermFilterBackend):
+    "Filter searches based on the URL of an updater in params"
+    query_param = 'updater'
+    field = 'serialized.updaters'
+
+
+class StatusFilterBackend(TermFilterBackend):
+    "Filter notes by status (open, closed, or hibernating)"
+    query_param = 'status'
+    field = 'serialized.status'
+
+    def get_value(self, value):
+        return value.lower()
+
+
+class PrivacyFilterBackend(TermFilterBackend):
+    "Filter notes by whether they are private"
+    query_param = 'is_private'
+    field = 'serialized.is_private'
+
+    def get_value(self, value):
+        return value.lower() in ('true', '1')
+
+
+class RelatedTopicFilterBackend(TermFilterBackend):
+    "Filter searches based on the URL of a related topic in params"
+    query_param = 'related_topic'
+    field = 'serialized.related_topics'
+
+
+class AssignedUserFilterBackend(TermFilterBackend):
+    "Filter notes based on the URL of an assigned user in params"
+    query_param = 'assigned_user'
+    field = 'serialized.assigned_users'
+
 
-    FIXME: work with multiple updaters? -> this'll likely be part of a more
-    general faceting strategy.
+class DateRangeFilterBackend(object):
     """
+    Filter searches by when items were created or last updated, with the
+    `created_after`, `created_before`, `last_updated_after` and
+    `last_updated_before` parameters. Each takes a date or an ISO 8601 date
+    and time, and bounds are inclusive. A date on its own as an upper bound
+    includes the whole of that day.
+    """
+    date_fields = ('created', 'last_updated')
+    bounds = (('after', 'gte'), ('before', 'lte'))
+
+    def clean_date(self, value):
+        try:
+            return parse_datetime(value) or parse_date(value)
+        except ValueError:
+            return None
+
     def filter_search(self, request, search, view):
         params = request.query_params
-        if 'updater' not in params:
-            return search
 
-        return search.filter('term', **{
-            'serialized.updater': params['updater']
-        })
+        for field in self.date_fields:
+            date_range = {}
+
+            for suffix, operator in self.bounds:
+                param = '{}_{}'.format(field, suffix)
+                if param not in params:
+                    continue
+                value = self.clean_date(params[param])
+                if value is None:
+                    raise ValidationError({
+                        param: ['Enter a valid date, or date and time.']
+                    })
+                if operator == 'lte' and not isinstance(value, datetime):
+                    # A date is read as midnight, so end before the next day
+                    operator, value = 'lt', value + timedelta(days=1)
+                date_range[operator] = value.isoformat()
+
+            if date_range:
+                search = search.filter('range', **{
+                    'serialized.' + field: date_range
+                })
+
+        return search
 
 
 class QFilterBackend(object):
@@ -68,7 +159,39 @@ class QFilterBackend(object):
         })
 
 
-# TODO: Make a new autocomplete filter.
+AUTOCOMPLETE_TYPES = ['note', 'topic', 'document']
+
+
+class AutocompleteFilterBackend(object):
+    """
+    Match the beginnings of words in items' titles (and topics' alternate
+    names) against the `q` parameter, optionally limited to the item types
+    in the comma-separated `type` parameter.
+
+    Private notes are only matched for users who can view them in the
+    request's project.
+    """
+    def filter_search(self, request, search, view):
+        params = request.query_params
+
+        search = search.query('match', autocomplete={
+            'query': clean_query_string(params.get('q', '')),
+            'operator': 'and'
+        })
+
+        types = [item_type for item_type in params.get('type', '').split(',')
+                 if item_type in AUTOCOMPLETE_TYPES]
+        search = search.doc_type(*(types or AUTOCOMPLETE_TYPES))
+
+        project = getattr(request, 'project', None)
+        user = request.user
+        if not (project and user and user.is_authenticated() and
+                user.has_project_perm(project, 'main.view_private_note')):
+            search = search.filter('bool', must_not=[
+                F('term', **{'serialized.is_private': True})
+            ])
+
+        return search
 
 
 ACTIVITY_TYPES = ['note', 'topic', 'document']
@@ -28,6 +28,10 @@ CONTEXT.update(OrderedDict((
         ('@container', '@index'),
     ))),
     ('aspects', 'vaem:hasAspect'),
+    ('assigned_users', OrderedDict((
+        ('@id', 'wn:assignedUser'),
+        ('@type', '@id'),
+    ))),
     ('data', OrderedDict((
         ('@id', '@graph'),
         ('@container', '@index'),
@@ -1,11 +1,60 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import binascii
+from collections import OrderedDict
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from elasticsearch_dsl import F
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(sort_values):
+    data = json.dumps(sort_values, separators=(',', ':'))
+    return urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    "Decode a cursor into sort values, or raise ValueError if it is invalid."
+    try:
+        sort_values = json.loads(
+            urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (TypeError, UnicodeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(sort_values, list) or len(sort_values) != 2:
+        raise ValueError('Invalid cursor')
+
+    return sort_values
 
 
 class ESLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Paginates searches with `start` and `count` parameters, or, when the
+    `cursor` parameter is given, with opaque cursors.
+
+    Offsets make Elasticsearch collect and sort every hit up to the end of the
+    requested page, so deep pages get slower and slower. A cursor instead
+    records the sort values of the last hit of a page, and the next page is
+    found by filtering for hits sorted after it, so every page costs the same.
+    Pass an empty `cursor` to get the first page; `next` links then carry the
+    cursor for the following page. In cursor mode, `count` is the number of
+    hits from the start of the current page on, and there are no `prev`
+    links.
+
+    Cursors are only available for views with a `cursor_field`, which must
+    be the field their results are sorted by, in descending order. Ties are
+    broken by the document's `_uid`.
+    """
     default_limit = 25
     limit_query_param = 'count'
     offset_query_param = 'start'
+    cursor_query_param = 'cursor'
     max_limit = 200
+    invalid_cursor_message = 'Invalid cursor'
 
     def paginate_queryset(self, search_query, request, view=None):
         raise Exception('This pagination class is only meant to work with '
@@ -16,8 +65,110 @@ class ESLimitOffsetPagination(LimitOffsetPagination):
         self.offset = self.get_offset(request)
         self.request = request
 
+        self.cursor_field = getattr(view, 'cursor_field', None)
+        self.cursor = self.get_cursor(request)
+
+        if self.cursor is not None:
+            return self.paginate_search_by_cursor(search, view)
+
         search = search[self.offset:self.offset + self.limit]
-        search_results = search.execute()
+        self.count, hits = self.execute_search(search, view)
+        return hits
+
+    def get_cursor(self, request):
+        """
+        Get the sort values encoded in the request's cursor. Returns None if
+        the request is not paginated by cursor, and an empty list for the
+        first page.
+        """
+        if not self.cursor_field:
+            return None
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor is None:
+            return None
+        if not cursor:
+            return []
+
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_search_by_cursor(self, search, view):
+        field = self.cursor_field
+        search = search.sort({field: {'order': 'desc'}}, '_uid')
+
+        if self.cursor:
+            value, uid = self.cursor
+            search = search.filter('bool', should=[
+                F('range', **{field: {'lt': value}}),
+                F('bool', must=[
+                    F('term', **{field: value}),
+                    F('range', _uid={'gt': uid}),
+                ]),
+            ])
+
+        # Get one more hit than needed to know whether there is a next page.
+        self.count, hits = self.execute_search(search[:self.limit + 1], view)
+
+        self.next_cursor = None
+        if len(hits) > self.limit:
+            hits = hits[:self.limit]
+            self.next_cursor = encode_cursor(hits[-1]['sort'])
+
+        return hits
+
+    def execute_search(self, search, view):
+        """
+        Execute a search, or get its results from the cache if the view
+        provides a key to cache them under. Returns the total number of hits
+        and the list of hits, and sets `facets` to the counts of any
+        aggregations in the search.
+        """
+        cache_key = None
+        if view is not None and hasattr(view, 'get_search_cache_key'):
+            cache_key = view.get_search_cache_key(search)
+
+        cached = cache.get(cache_key) if cache_key else None
+
+        if cached is None:
+            search_results = search.execute()
+            cached = (search_results.hits.total, search_results.hits.hits,
+                      self.get_facets(search, search_results))
+            if cache_key:
+                cache.set(cache_key, cached,
+                          settings.ELASTICSEARCH_LIST_CACHE_TIMEOUT)
+
+        count, hits, self.facets = cached
+        return count, hits
+
+    def get_facets(self, search, search_results):
+        "Get the buckets of each terms aggregation in a search's results."
+        return OrderedDict(
+            (name, [
+                OrderedDict((
+                    ('value', bucket['key']),
+                    ('count', bucket['doc_count']),
+                ))
+                for bucket in search_results.aggregations[name]['buckets']
+            ])
+            for name in search.to_dict().get('aggs', {})
+        )
+
+    def get_next_link(self):
+        if self.cursor is None:
+            return super(ESLimitOffsetPagination, self).get_next_link()
+
+        if self.next_cursor is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.next_cursor)
 
-        self.count = search_results.hits.total
-        return search_results.hits.hits
+    def get_previous_link(self):
+        if self.cursor is None:
+            return super(ESLimitOffsetPagination, self).get_previous_link()
+        return None
@@ -8,7 +8,8 @@ from editorsnotes.main.models import Document, Scan, Transcript
 from editorsnotes.main.utils import remove_stray_brs
 
 from .. import fields
-from .mixins import RelatedTopicSerializerMixin, EmbeddedItemsMixin
+from .mixins import (RelatedTopicSerializerMixin, EmbeddedItemsMixin,
+                     ItemListSerializer)
 from ..ld import ROOT_NAMESPACE
 
 __all__ = ['DocumentSerializer', 'ScanSerializer', 'TranscriptSerializer']
@@ -108,6 +109,7 @@ class DocumentSerializer(RelatedTopicSerializerMixin, EmbeddedItemsMixin,
 
     class Meta:
         model = Document
+        list_serializer_class = ItemListSerializer
         fields = (
             'id',
             'url',
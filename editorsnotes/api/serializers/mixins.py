@@ -4,7 +4,9 @@ import json
 from urllib.parse import urlparse
 
 from django.core.urlresolvers import resolve
+from django.db import models
 
+from rest_framework import serializers
 from rest_framework.renderers import JSONRenderer
 
 from editorsnotes.auth.models import User
@@ -13,6 +15,24 @@ from editorsnotes.search.items.helpers import get_data_for_urls
 ensure_list = lambda val: [val] if isinstance(val, str) else val
 
 
+class ItemListSerializer(serializers.ListSerializer):
+    """
+    List serializer which looks up the referencing items and updaters of all
+    of its items at once, instead of with queries for each item.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        model = self.child.Meta.model
+
+        if items:
+            if hasattr(model, 'prefetch_referencing_items'):
+                model.prefetch_referencing_items(items)
+            if hasattr(model, 'prefetch_updaters'):
+                model.prefetch_updaters(items)
+
+        return super(ItemListSerializer, self).to_representation(items)
+
+
 class EmbeddedItemsMixin(object):
     def __init__(self, *args, **kwargs):
         self.include_embeds = kwargs.pop('include_embeds', False)
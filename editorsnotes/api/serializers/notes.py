@@ -8,7 +8,8 @@ from .. import fields
 from ..ld import ROOT_NAMESPACE
 from ..validators import UniqueToProjectValidator
 
-from .mixins import EmbeddedItemsMixin, RelatedTopicSerializerMixin
+from .mixins import (EmbeddedItemsMixin, ItemListSerializer,
+                     RelatedTopicSerializerMixin)
 
 
 __all__ = ['NoteSerializer']
@@ -43,6 +44,7 @@ class NoteSerializer(RelatedTopicSerializerMixin, EmbeddedItemsMixin,
 
     license = LicenseSerializer(read_only=True, source='get_license')
     updaters = fields.UpdatersField()
+    assigned_users = fields.AssignedUsersField()
 
     status = NoteStatusField()
     related_topics = fields.TopicAssignmentField(many=True)
@@ -54,6 +56,7 @@ class NoteSerializer(RelatedTopicSerializerMixin, EmbeddedItemsMixin,
 
     class Meta:
         model = Note
+        list_serializer_class = ItemListSerializer
         fields = (
             'id',
             'url',
@@ -68,6 +71,7 @@ class NoteSerializer(RelatedTopicSerializerMixin, EmbeddedItemsMixin,
             'created',
             'last_updated',
             'updaters',
+            'assigned_users',
 
             'markup',
             'markup_html',
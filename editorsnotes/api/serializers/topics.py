@@ -7,7 +7,8 @@ from .. import fields
 from ..validators import UniqueToProjectValidator
 from ..ld import ROOT_NAMESPACE
 
-from .mixins import EmbeddedItemsMixin, RelatedTopicSerializerMixin
+from .mixins import (EmbeddedItemsMixin, ItemListSerializer,
+                     RelatedTopicSerializerMixin)
 
 
 __all__ = ['TopicSerializer', 'ENTopicSerializer']
@@ -50,6 +51,7 @@ class TopicSerializer(EmbeddedItemsMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Topic
+        list_serializer_class = ItemListSerializer
         fields = (
             'id',
             'url',
@@ -107,6 +109,7 @@ class ENTopicSerializer(RelatedTopicSerializerMixin, EmbeddedItemsMixin,
 
     class Meta:
         model = Topic
+        list_serializer_class = ItemListSerializer
         fields = (
             'url',
             'preferred_name',
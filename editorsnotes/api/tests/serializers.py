@@ -154,3 +154,30 @@ class TopicSerializerTestCase(ClearContentTypesTransactionTestCase):
                 "@graph": {}
             }
         })
+
+    def test_topic_list_serializer(self):
+        note = main_models.Note.objects.create(
+            title='Emma Goldman\'s life',
+            markup='A note about @@t{}'.format(self.topic.id),
+            creator=self.user, last_updater=self.user, project=self.project)
+
+        topics = [self.topic]
+        topics.append(main_models.Topic.objects.create(
+            creator=self.user,
+            last_updater=self.user,
+            project=self.project,
+            preferred_name='Alexander Berkman'
+        ))
+
+        serializer = en_serializers.TopicSerializer(
+            instance=topics, many=True, context=self.context)
+
+        self.assertEqual(
+            [topic['referenced_by'] for topic in serializer.data],
+            [[self.dummy_request.build_absolute_uri(note.get_absolute_url())],
+             []])
+        self.assertEqual(list(serializer.data), [
+            en_serializers.TopicSerializer(
+                instance=topic, context=self.context).data
+            for topic in topics
+        ])
@@ -249,6 +249,97 @@ class TopicAPITestCase(ClearContentTypesTransactionTestCase):
         self.assertEqual(topic_obj.preferred_name,
                          TEST_TOPIC['preferred_name'])
 
+    def test_topic_api_list_cursor(self):
+        "Topic lists should be walkable page by page with cursors"
+        flush_es_indexes()
+
+        topics = [
+            create_topic(user=self.user, project=self.project,
+                         preferred_name='Topic {}'.format(i))
+            for i in range(3)
+        ]
+
+        url = reverse('api:topics-list', args=[self.project.slug])
+        response = self.client.get(url, {'cursor': '', 'count': 2},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['prev'])
+        self.assertIn('cursor=', response.data['next'])
+
+        ids = [topic['id'] for topic in response.data['results']]
+
+        response = self.client.get(response.data['next'],
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+        ids += [topic['id'] for topic in response.data['results']]
+        self.assertEqual(sorted(ids), sorted(topic.id for topic in topics))
+
+        response = self.client.get(url, {'cursor': 'invalid'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_topic_api_list_after_flush(self):
+        "Cached lists should not outlive the index they were read from"
+        flush_es_indexes()
+        create_topic(user=self.user, project=self.project)
+        url = reverse('api:topics-list', args=[self.project.slug])
+
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.data['count'], 1)
+
+        flush_es_indexes()
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+
+    def test_topic_api_autocomplete(self):
+        "Topics should be suggested by the beginnings of any of their names"
+        flush_es_indexes()
+        topic_obj = create_topic(user=self.user, project=self.project)
+
+        url = reverse('api:projects-autocomplete', args=[self.project.slug])
+
+        for q in ('pat', 'Golden', 'patrick gol', 'str'):
+            response = self.client.get(url, {'q': q},
+                                       HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 1)
+            self.assertEqual(response.data['results'][0]['type'], 'topic')
+            self.assertEqual(response.data['results'][0]['title'],
+                             topic_obj.as_text())
+
+        response = self.client.get(url, {'q': 'pat', 'type': 'note'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.data['count'], 0)
+
+        response = self.client.get(reverse('api:autocomplete'),
+                                   {'q': 'golden pat'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_note_api_autocomplete_private(self):
+        "Private notes should only be suggested to those who can view them"
+        flush_es_indexes()
+        main_models.Note.objects.create(
+            title='Patrick\'s private note', is_private=True,
+            creator=self.user, last_updater=self.user, project=self.project)
+
+        url = reverse('api:projects-autocomplete', args=[self.project.slug])
+
+        self.assertFalse(self.user.is_superuser)
+        response = self.client.get(url, {'q': 'private', 'type': 'note'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.data['count'], 1)
+
+        self.client.logout()
+        response = self.client.get(url, {'q': 'private', 'type': 'note'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.data['count'], 0)
+
     def test_topic_api_list_other_projects(self):
         "Other projects' topic lists should be viewable, even if logged out"
         self.client.logout()
@@ -480,6 +571,27 @@ class DocumentAPITestCase(ClearContentTypesTransactionTestCase):
         self.assertEqual(response.data['description'],
                          ['Document with this description already exists.'])
 
+    def test_document_api_list_facets(self):
+        "Document lists should count hits by the facets asked for"
+        flush_es_indexes()
+        create_document(
+            project=self.project, creator=self.user, last_updater=self.user)
+
+        response = self.client.get(reverse('api:documents-list',
+                                           args=[self.project.slug]),
+                                   {'facets': 'type,zotero_data.itemType,bad'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['facets'], {
+            'type': [{'value': 'document', 'count': 1}],
+            'zotero_data.itemType': [{'value': 'book', 'count': 1}],
+        })
+
+        response = self.client.get(reverse('api:documents-list',
+                                           args=[self.project.slug]),
+                                   HTTP_ACCEPT='application/json')
+        self.assertNotIn('facets', response.data)
+
     def test_document_api_list(self):
         """
         Creating a document should add it to the ElasticSearch index, which
@@ -760,6 +872,80 @@ class NoteAPITestCase(ClearContentTypesTransactionTestCase):
 
         self.assertEqual(response.data, original_response_content)
 
+    def test_note_api_list_filters(self):
+        "Note lists should be filterable by status, privacy, dates and users"
+        flush_es_indexes()
+        note_obj = self.create_test_note()
+        note_obj.assigned_users.add(self.user)
+
+        user_url = self.client.request()\
+            .wsgi_request\
+            .build_absolute_uri(self.user.get_absolute_url())
+        url = reverse('api:notes-list', args=[self.project.slug])
+
+        def count(params):
+            response = self.client.get(url, params,
+                                       HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 200)
+            return response.data['count']
+
+        self.assertEqual(count({'status': 'open'}), 1)
+        self.assertEqual(count({'status': 'closed'}), 0)
+        self.assertEqual(count({'is_private': 'false'}), 1)
+        self.assertEqual(count({'is_private': 'true'}), 0)
+        self.assertEqual(count({'updater': user_url}), 1)
+        self.assertEqual(count({'assigned_user': user_url}), 1)
+        self.assertEqual(count({'assigned_user': user_url + 'x'}), 0)
+
+        note_obj.assigned_users.remove(self.user)
+        self.assertEqual(count({'assigned_user': user_url}), 0)
+        note_obj.assigned_users.add(self.user)
+
+        self.assertEqual(count({'created_after': '2000-01-01'}), 1)
+        self.assertEqual(count({'last_updated_before': '2000-01-01'}), 0)
+
+        # A date alone as an upper bound includes the whole day
+        today = note_obj.created.date().isoformat()
+        self.assertEqual(count({'created_before': today}), 1)
+        self.assertEqual(count({'last_updated_before': today}), 1)
+
+        response = self.client.get(url, {'created_after': 'yesterday'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_note_api_list_fields(self):
+        "Note lists should only include the fields asked for"
+        flush_es_indexes()
+        note_obj = self.create_test_note()
+        url = reverse('api:notes-list', args=[self.project.slug])
+
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('markup', response.data['results'][0])
+        self.assertNotIn('markup_html', response.data['results'][0])
+
+        response = self.client.get(url, {'fields': 'title,url'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {
+            'title': note_obj.title,
+            'url': response.data['results'][0]['url']
+        })
+
+        response = self.client.get(url, {'fields': 'title,markup_html'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(set(response.data['results'][0]),
+                         {'title', 'markup_html'})
+
+        response = self.client.get(url, {'fields': '*'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertIn('markup_html', response.data['results'][0])
+
+        response = self.client.get(url, {'fields': 'nonexistent'},
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {})
+
     def test_note_api_update(self):
         "Updating a note in your own project is ok"
         note_obj = self.create_test_note()
@@ -857,3 +1043,31 @@ class NoteAPITestCase(ClearContentTypesTransactionTestCase):
         )
         self.assertEqual(response.status_code, 403)
         self.assertEqual(response.data['detail'], NO_AUTHENTICATION_MESSAGE)
+
+
+class BrowseAPITestCase(ClearContentTypesTransactionTestCase):
+    fixtures = ['projects.json']
+
+    def setUp(self):
+        self.user = User.objects.get(email='barry@example.com')
+        self.project = Project.objects.get(slug='emma')
+
+    def test_browse_items(self):
+        "Browsing should list recent items, and notice new ones"
+        flush_es_indexes()
+        create_topic(user=self.user, project=self.project)
+
+        response = self.client.get(reverse('api:browse'),
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data),
+                         ['topics', 'documents', 'notes', 'projects'])
+        self.assertEqual(len(response.data['topics']), 1)
+
+        create_topic(user=self.user, project=self.project,
+                     preferred_name='Emma Goldman')
+
+        response = self.client.get(reverse('api:browse'),
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual([topic['title'] for topic in response.data['topics']],
+                         ['Emma Goldman', TEST_TOPIC['preferred_name']])
@@ -34,6 +34,7 @@ project_specific_patterns = [
     url(r'^$', views.ProjectDetail.as_view(), name='projects-detail'),
     url(r'^vocab$', views.ProjectAPIDocumentation.as_view(), name='projects-api-documentation'),
     url(r'^activity/$', views.ActivityView.as_view(), name='projects-activity'),
+    url(r'^autocomplete/$', views.ProjectAutocompleteView.as_view(), name='projects-autocomplete'),
 
     ### Topics ###
     url(r'^topics/$', views.TopicList.as_view(), name='topics-list'),
@@ -64,6 +65,7 @@ urlpatterns = [
     url(r'^browse/$', views.browse.browse_items, name='browse'),
     url(r'^auth-token/$', obtain_auth_token, name='obtain-auth-token'),
     url(r'^search/$', views.SearchView.as_view(), name='search'),
+    url(r'^autocomplete/$', views.AutocompleteView.as_view(), name='autocomplete'),
     url(r'^notes/$', views.AllProjectNoteList.as_view(), name='all-projects-notes-list'),
     url(r'^projects/$', views.ProjectList.as_view(), name='projects-list'),
     url(r'^projects/(?P<project_slug>[\w\-]+)/', include(project_specific_patterns)),
@@ -105,6 +105,10 @@ class ActivityView(ElasticSearchListMixin, ListAPIView):
 
     es_filter_backends = (ActivityFilterBackend,)
     queryset = LogActivity.objects.all()
+    cursor_field = None
+    es_source_field = 'data'
+    es_default_excludes = ()
+    facet_fields = {}
 
     def get_object(self):
         user_pk = self.kwargs.get('pk', None)
@@ -119,7 +123,11 @@ class ActivityView(ElasticSearchListMixin, ListAPIView):
         return obj
 
     def process_es_result(self, result):
-        return result['_source']['data']
+        return result['_source'].get(self.es_source_field, {})
+
+    def get_search_cache_key(self, search):
+        # Project change counters only track the items index.
+        return None
 
     def get_es_search(self):
         search = activity_index.make_search().sort('-time')
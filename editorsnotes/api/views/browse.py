@@ -1,5 +1,8 @@
 from collections import OrderedDict
 
+from django.conf import settings
+from django.core.cache import cache
+
 from elasticsearch_dsl import Search
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -10,6 +13,7 @@ from editorsnotes.api.serializers.hydra import link_properties_for_project
 from editorsnotes.auth.models import Project
 from editorsnotes.main.models import Note, Topic, Document
 from editorsnotes.search import items_index
+from editorsnotes.search.items.cache import get_generation, get_items_version
 
 
 __all__ = ['root', 'browse_items']
@@ -61,29 +65,55 @@ def root(request, format=None):
     return Response(data)
 
 
-def search_model(Model, query):
-    es_query = items_index\
-        .make_search_for_model(Model)\
-        .fields(['display_title', 'url'])
+BROWSE_MODELS = (
+    ('topics', Topic),
+    ('documents', Document),
+    ('notes', Note),
+    ('projects', Project),
+)
+
+
+def get_browse_cache_key():
+    "The cached browse results are discarded whenever any item changes."
+    return 'api:browse:{}:{}'.format(get_items_version(), get_generation())
+
 
-    results = es_query.execute()
+def get_recent_items():
+    """
+    Get the titles and URLs of the most recently updated items of each type,
+    with one request to Elasticsearch.
+    """
+    es_query = Search()\
+        .sort('-serialized.last_updated')\
+        .extra(_source=['display_title', 'url'])[:10]
 
-    return [
-        { 'title': result.display_title[0], 'url': result.url[0] }
-        for result in results.hits
-    ]
+    searches = []
+    for key, Model in BROWSE_MODELS:
+        query = es_query
+        if Model is Note:
+            query = query.filter('term', **{'serialized.is_private': 'false'})
+        type_label = items_index.document_types[Model].type_label
+        searches.append((type_label, query.to_dict()))
+
+    responses = items_index.multi_search(searches)
+
+    return OrderedDict(
+        (key, [
+            {'title': hit['_source']['display_title'],
+             'url': hit['_source']['url']}
+            for hit in response['hits']['hits']
+        ])
+        for (key, Model), response in zip(BROWSE_MODELS, responses)
+    )
 
 
 @api_view(['GET'])
 def browse_items(request, format=None):
-    es_query = Search().sort('-serialized.last_updated')[:10]
-    ret = OrderedDict()
-
-    ret['topics'] = search_model(Topic, es_query)
-    ret['documents'] = search_model(Document, es_query)
-    ret['notes'] = search_model(Note, es_query.filter(
-        'term', **{'serialized.is_private': 'false'}
-    ))
-    ret['projects'] = search_model(Project, es_query)
+    cache_key = get_browse_cache_key()
+    ret = cache.get(cache_key)
+
+    if ret is None:
+        ret = get_recent_items()
+        cache.set(cache_key, ret, settings.ELASTICSEARCH_BROWSE_CACHE_TIMEOUT)
 
     return Response(ret)
@@ -22,6 +22,8 @@ class DocumentList(ElasticSearchListMixin, BaseListAPIView):
         es_filters.ProjectFilterBackend,
         es_filters.QFilterBackend,
         es_filters.UpdaterFilterBackend,
+        es_filters.RelatedTopicFilterBackend,
+        es_filters.DateRangeFilterBackend,
     )
     hydra_project_perms = ('main.add_document',)
 
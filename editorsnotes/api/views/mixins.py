@@ -1,5 +1,6 @@
 from collections import OrderedDict
 
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 
 from rest_framework.response import Response
@@ -8,6 +9,7 @@ from editorsnotes.api.serializers import ProjectSerializer
 from editorsnotes.auth.models import Project, LogActivity
 from editorsnotes.main.models.base import Administered
 from editorsnotes.search import items_index
+from editorsnotes.search.items.cache import get_search_cache_key
 
 from ..serializers.hydra import hydra_class_for_type
 from ..pagination import ESLimitOffsetPagination
@@ -58,12 +60,83 @@ class ElasticSearchListMixin(object):
 
     es_filter_backends = []
     pagination_class = ESLimitOffsetPagination
+    cursor_field = 'serialized.last_updated'
+
+    fields_query_param = 'fields'
+    es_source_field = 'serialized'
+    es_default_excludes = ('markup_html',)
+
+    facets_query_param = 'facets'
+    facet_size = 25
+    facet_fields = OrderedDict((
+        ('type', '_type'),
+        ('project', 'serialized.project'),
+        ('status', 'serialized.status'),
+        ('is_private', 'serialized.is_private'),
+        ('updaters', 'serialized.updaters'),
+        ('related_topics', 'serialized.related_topics'),
+        ('zotero_data.itemType', 'serialized.zotero_data.itemType'),
+    ))
 
     def filter_search(self, search):
         for backend in list(self.es_filter_backends):
             search = backend().filter_search(self.request, search, self)
         return search
 
+    def filter_source(self, search):
+        """
+        Limit the fields of each result returned by Elasticsearch.
+
+        The `fields` parameter is a comma-separated list of fields to return,
+        e.g. `?fields=title,url,last_updated`. Fields prefixed with `-` are
+        left out instead. Unless they are asked for, the fields in
+        `es_default_excludes` are left out wherever they are nested, and
+        `?fields=*` returns every field.
+        """
+        param = self.request.query_params.get(self.fields_query_param, '')
+        names = [name.strip() for name in param.split(',') if name.strip()]
+
+        if '*' in names:
+            return search
+
+        includes = [name for name in names if not name.startswith('-')]
+        excludes = [name[1:] for name in names if name.startswith('-')]
+        excludes += [name for name in self.es_default_excludes
+                     if name not in includes]
+
+        prefix = self.es_source_field + '.'
+        source = {}
+
+        if includes:
+            source['include'] = [prefix + name for name in includes]
+        if excludes:
+            source['exclude'] = [prefix + pattern + name
+                                 for name in excludes
+                                 for pattern in ('', '*.')]
+
+        return search.extra(_source=source) if source else search
+
+    def facet_search(self, search):
+        """
+        Count the hits of the search by each of the fields named in the
+        comma-separated `facets` parameter, e.g.
+        `?facets=updaters,related_topics`. The counts are computed in the same
+        request as the page of hits, and cover every hit counted in `count`.
+        Names not in `facet_fields` are ignored.
+        """
+        param = self.request.query_params.get(self.facets_query_param, '')
+        names = [name.strip() for name in param.split(',')
+                 if name.strip() in self.facet_fields]
+
+        if names:
+            search = search._clone()
+            for name in names:
+                search.aggs.bucket(name, 'terms',
+                                   field=self.facet_fields[name],
+                                   size=self.facet_size)
+
+        return search
+
     def paginate_search(self, search):
         "Proxy method to paginate_queryset to make things less confusing."
         return self.paginator.paginate_search(search, self.request, view=self)
@@ -75,11 +148,25 @@ class ElasticSearchListMixin(object):
             .sort('-serialized.last_updated')
 
     def process_es_result(self, result):
-        return result['_source']['serialized']
+        # Nothing is returned under the source field if none of the fields
+        # asked for exist
+        return result['_source'].get(self.es_source_field, {})
+
+    def get_search_cache_key(self, search):
+        """
+        Results of searches within a project are cached until one of the
+        project's items changes.
+        """
+        project = getattr(self.request, 'project', None)
+        if project is None or not settings.ELASTICSEARCH_LIST_CACHE_TIMEOUT:
+            return None
+        return get_search_cache_key(project.slug, search)
 
     def list(self, request, *args, **kwargs):
         search = getattr(self, 'search', self.get_es_search())
         search = self.filter_search(search)
+        search = self.filter_source(search)
+        search = self.facet_search(search)
 
         # Responses will __always__ be paginated. `paginate_search` will
         # execute the query and return the hits as indexed in Elasticsearch.
@@ -95,6 +182,9 @@ class ElasticSearchListMixin(object):
             ('results', list(map(self.process_es_result, results)))
         ))
 
+        if self.paginator.facets:
+            data['facets'] = self.paginator.facets
+
         if hasattr(request, 'project'):
             serializer = ProjectSerializer(instance=request.project,
                                            context={'request': request})
@@ -26,8 +26,8 @@ class NotePermissions(ProjectSpecificPermissions):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS and obj.is_private:
             if request.user and request.user.is_authenticated():
-                return request.user.has_project_perms(request.project,
-                                                      'main.view_private_note')
+                return request.user.has_project_perm(request.project,
+                                                     'main.view_private_note')
         else:
             return True
 
@@ -41,6 +41,11 @@ class NoteList(ElasticSearchListMixin, BaseListAPIView):
         es_filters.ProjectFilterBackend,
         es_filters.QFilterBackend,
         es_filters.UpdaterFilterBackend,
+        es_filters.StatusFilterBackend,
+        es_filters.PrivacyFilterBackend,
+        es_filters.RelatedTopicFilterBackend,
+        es_filters.AssignedUserFilterBackend,
+        es_filters.DateRangeFilterBackend,
     )
 
 
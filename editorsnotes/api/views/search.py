@@ -3,33 +3,84 @@ from collections import OrderedDict
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 
-from editorsnotes.search import items as items_search
+from editorsnotes.search import items as items_search, items_index
 
-__all__ = ['SearchView']
+from .. import filters as es_filters
+from .mixins import ProjectSpecificMixin
 
+__all__ = ['SearchView', 'AutocompleteView', 'ProjectAutocompleteView']
 
-class SearchView(GenericAPIView):
+
+class AutocompleteMixin(object):
+    """
+    Mixin for views which suggest items whose titles start with the words
+    typed so far. Only the fields needed to display the suggestions are
+    fetched from Elasticsearch.
+    """
+    autocomplete_filter_backends = (
+        es_filters.ProjectFilterBackend,
+        es_filters.AutocompleteFilterBackend,
+    )
+    default_autocomplete_count = 10
+    max_autocomplete_count = 25
+
+    def get_autocomplete_count(self, request):
+        try:
+            count = int(request.query_params['count'])
+        except (KeyError, ValueError):
+            return self.default_autocomplete_count
+        return max(1, min(count, self.max_autocomplete_count))
+
+    def autocomplete(self, request):
+        search = items_index.make_search()
+        for backend in self.autocomplete_filter_backends:
+            search = backend().filter_search(request, search, self)
+
+        search = search.extra(_source=['display_title', 'url'])
+        search = search[:self.get_autocomplete_count(request)]
+        result = search.execute()
+
+        return Response(OrderedDict((
+            ('count', result.hits.total),
+            ('results', [
+                OrderedDict((
+                    ('type', hit['_type']),
+                    ('title', hit['_source']['display_title']),
+                    ('url', hit['_source']['url']),
+                )) for hit in result.hits.hits
+            ])
+        )))
+
+
+class AutocompleteView(AutocompleteMixin, GenericAPIView):
+    """
+    Suggest items across all projects, or within the project whose URL is
+    given in the `project` parameter.
+
+    Takes the following arguments:
+        * q (the text typed so far)
+        * type ("note", "topic", "document", or several, comma-separated)
+        * count (the number of suggestions, at most 25)
+    """
+    def get(self, request, format=None):
+        return self.autocomplete(request)
+
+
+class ProjectAutocompleteView(ProjectSpecificMixin, AutocompleteView):
+    """
+    Suggest items within a project. Takes the same arguments as the
+    autocomplete view for all projects.
+    """
+    pass
+
+
+class SearchView(AutocompleteMixin, GenericAPIView):
     def get(self, request, format=None):
         query = {'query': {}}
         params = request.query_params
 
         if 'autocomplete' in params:
-            # self.filter_backend = ElasticSearchAutocompleteFilterBackend
-            result = self.filter_queryset(None)
-            data = {
-                'count': result['hits']['total'],
-                'results': [
-                    OrderedDict((
-                        ('type', doc['_type']),
-                        ('title', doc['highlight' if 'highlight' in doc else
-                                      'fields']['display_title'][0 if
-                                                                 'highlight' in
-                                                                 doc else 0:None]),
-                        ('url', doc['fields']['display_url'])
-                    )) for doc in result['hits']['hits']
-                ]
-            }
-            return Response(data)
+            return self.autocomplete(request)
 
         if 'q' in params:
             query['query']['query_string'] = {'query': params.get('q')}
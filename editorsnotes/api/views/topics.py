@@ -30,6 +30,8 @@ class TopicList(ElasticSearchListMixin, BaseListAPIView):
         es_filters.ProjectFilterBackend,
         es_filters.QFilterBackend,
         es_filters.UpdaterFilterBackend,
+        es_filters.RelatedTopicFilterBackend,
+        es_filters.DateRangeFilterBackend,
     )
     hydra_project_perms = ('main.add_topic',)
 
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from collections import Counter
+from collections import Counter, defaultdict
 
 from django.conf import settings
 from django.contrib.auth.models import (
@@ -11,7 +11,7 @@ from django.db import models
 from django.dispatch import receiver
 from django.utils import timezone
 
-from reversion.models import Revision
+from reversion.models import Revision, Version
 from licensing.models import License
 
 from editorsnotes.main.management import get_all_project_permissions
@@ -176,6 +176,9 @@ class UpdatersMixin(object):
     Mixin with method for determining all updaters of a model.
     """
     def get_all_updaters(self):
+        if hasattr(self, '_updaters_cache'):
+            return self._updaters_cache
+
         ct = ContentType.objects.get_for_model(self.__class__)
         qs = Revision.objects\
             .select_related('user')\
@@ -184,6 +187,26 @@ class UpdatersMixin(object):
         user_counter = Counter([revision.user for revision in qs])
         return [user for user, count in user_counter.most_common()]
 
+    @classmethod
+    def prefetch_updaters(cls, objects):
+        """
+        Look up the updaters of many objects of this class with one query,
+        to be returned by their `get_all_updaters` methods.
+        """
+        ct = ContentType.objects.get_for_model(cls)
+        versions = Version.objects\
+            .select_related('revision__user')\
+            .filter(content_type_id=ct.id,
+                    object_id_int__in=[obj.id for obj in objects])
+
+        counters = defaultdict(Counter)
+        for version in versions:
+            counters[version.object_id_int][version.revision.user] += 1
+
+        for obj in objects:
+            obj._updaters_cache = [
+                user for user, count in counters[obj.id].most_common()]
+
 
 class ProjectPermissionsMixin(object):
     """
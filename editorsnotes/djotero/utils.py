@@ -25,29 +25,38 @@ def get_item_types():
         cache.set('item_types', data, 60 * 24 * 7)
     data = json.loads(cache.get('item_types'))
 
-    from editorsnotes.main.models import Document
-    from editorsnotes.search import items
-    en_index = items.index
-    facet_search = en_index.search_model(Document, {
-        'query': {'filtered': {'query': {'match_all': {}}}},
-        'facets': {
-            'itemTypes': {
-                'terms': {
-                    'field': 'serialized.zotero_data.itemType',
-                    'size': 10
-                }
-            }
-        }
-    })
-
-    used_item_types = facet_search['facets']['itemTypes']['terms']
-
     return {
         'itemTypes': data,
-        'common': [item_type['term'] for item_type in used_item_types[:10]]
+        'common': get_common_item_types()
     }
 
 
+def get_common_item_types(size=10):
+    """
+    Get the Zotero item types used most often by indexed documents. The
+    counts are cached until any item changes.
+    """
+    from editorsnotes.main.models import Document
+    from editorsnotes.search import items_index
+    from editorsnotes.search.items.cache import (get_generation,
+                                                 get_items_version)
+
+    cache_key = 'djotero:common-item-types:{}:{}'.format(
+        get_items_version(), get_generation())
+    common = cache.get(cache_key)
+
+    if common is None:
+        search = items_index.make_search_for_model(Document)[:0]
+        search.aggs.bucket('itemTypes', 'terms',
+                           field='serialized.zotero_data.itemType',
+                           size=size)
+        buckets = search.execute().aggregations['itemTypes']['buckets']
+        common = [bucket['key'] for bucket in buckets]
+        cache.set(cache_key, common, 60 * 60)
+
+    return common
+
+
 def get_item_template(item_type):
     if not cache.get('item_template_%s' % item_type):
         url = '%s/items/new?itemType=%s' % (ZOTERO_BASE_URL, item_type)
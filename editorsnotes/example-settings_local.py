@@ -30,6 +30,10 @@ ELASTICSEARCH_PREFIX = 'editorsnotes'
 #
 ELASTICSEARCH_URLS = 'http://127.0.0.1:9200'
 
+# Set to True to index changed items in batches with a separate worker process
+# (`manage.py process_index_queue --forever`) instead of during each request.
+# ELASTICSEARCH_DEFERRED_INDEXING = False
+
 # The base URL for your site, with protocol, hostname, and port (if not 80 for
 # http or 443 for https). This will be used to construct fully-qualified URLs
 # from hyperlinks in the Elasticsearch index.
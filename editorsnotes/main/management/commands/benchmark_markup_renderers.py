@@ -0,0 +1,79 @@
+import time
+
+from lxml import etree, html
+
+from django.core.management.base import BaseCommand
+
+from editorsnotes.main.utils.markup import (
+    RENDERERS, format_items, get_rendered_markup, scan_transcluded_items)
+
+from .rerender_markup import MARKUP_MODELS
+
+
+def normalize(markup_html):
+    "Parse and serialize a rendered fragment, so outputs can be compared."
+    fragment = html.fragment_fromstring(markup_html.strip(),
+                                        create_parent='div')
+    return etree.tostring(fragment, encoding='unicode')
+
+
+class Command(BaseCommand):
+    help = ('Time rendering a sample of existing markup with each markup '
+            'renderer, bypassing the render cache, and compare their output.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=50,
+            help='Number of items of each type to sample.')
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Number of times to render each sample with each renderer.')
+
+    def get_samples(self, count):
+        samples = []
+        for model in MARKUP_MODELS.values():
+            qs = model.objects.exclude(markup=None).exclude(markup='')\
+                .order_by('-pk')
+            for obj in qs[:count]:
+                project = obj.get_affiliation()
+                items = format_items(scan_transcluded_items(obj.markup),
+                                     project)
+                samples.append((obj.markup, items, project))
+        return samples
+
+    def handle(self, *args, **options):
+        samples = self.get_samples(options['count'])
+        if not samples:
+            self.stdout.write('No markup to render.')
+            return
+
+        timings = {}
+        outputs = {}
+
+        for renderer in RENDERERS:
+            start = time.time()
+            for i in range(options['repeat']):
+                rendered = [
+                    get_rendered_markup(markup, items, project, renderer)
+                    for markup, items, project in samples
+                ]
+            timings[renderer] = ((time.time() - start) * 1000 /
+                                 (options['repeat'] * len(samples)))
+            outputs[renderer] = [normalize(fragment) for fragment in rendered]
+
+            self.stdout.write('{}: {:.2f} ms per document'.format(
+                renderer, timings[renderer]))
+
+        self.stdout.write('Speedup of python over http: {:.1f}x'.format(
+            timings['http'] / timings['python']))
+
+        mismatches = [
+            markup for markup, http_output, python_output in zip(
+                (markup for markup, items, project in samples),
+                outputs['http'], outputs['python'])
+            if http_output != python_output
+        ]
+        self.stdout.write('{} of {} documents rendered differently'.format(
+            len(mismatches), len(samples)))
+        for markup in mismatches[:10]:
+            self.stdout.write('  {!r}'.format(markup[:80]))
@@ -0,0 +1,129 @@
+from collections import OrderedDict, defaultdict
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from editorsnotes.auth.models import Project
+from editorsnotes.main.models import ItemReference, Note, Topic, Transcript
+from editorsnotes.main.utils.markup import render_markup_batch
+from editorsnotes.search import items_index
+from editorsnotes.search.items.cache import invalidate_items
+
+
+MARKUP_MODELS = OrderedDict((
+    ('note', Note),
+    ('topic', Topic),
+    ('transcript', Transcript),
+    ('project', Project),
+))
+
+
+def bulk_update_markup_html(model, rendered):
+    """
+    Write the rendered markup of many objects of a model with one UPDATE
+    statement, without saving them or sending any signals. `rendered` is a
+    dict of rendered fragments by primary key.
+    """
+    if not rendered:
+        return
+
+    field = model._meta.get_field('markup_html')
+    quote_name = connection.ops.quote_name
+
+    params = []
+    for pk, markup_html in rendered.items():
+        params += [pk, field.get_prep_value(markup_html)]
+
+    sql = (
+        'UPDATE {table} SET {column} = data.markup_html::xml '
+        'FROM (VALUES {values}) AS data (pk, markup_html) '
+        'WHERE {table}.{pk_column} = data.pk'
+    ).format(
+        table=quote_name(model._meta.db_table),
+        column=quote_name(field.column),
+        pk_column=quote_name(model._meta.pk.column),
+        values=', '.join(['(%s, %s)'] * len(rendered)))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+class Command(BaseCommand):
+    help = ('Render the markup of every note, topic, transcript and project '
+            'again, e.g. after the markup renderer\'s output has changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models',
+            choices=list(MARKUP_MODELS),
+            help='Only re-render items of this type. Can be repeated.')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of items to render and update at a time.')
+        parser.add_argument(
+            '--no-index', action='store_false', dest='index', default=True,
+            help='Do not reindex re-rendered items in Elasticsearch.')
+        parser.add_argument(
+            '--use-cache', action='store_true', dest='use_cache',
+            default=False,
+            help=('Reuse cached renderings instead of rendering every item '
+                  'again. Only useful if the renderer has not changed.'))
+
+    def get_queryset(self, model):
+        if model in items_index.document_types:
+            qs = items_index.document_types[model].get_queryset()
+        else:
+            qs = model.objects.all()
+        return qs.exclude(markup=None).exclude(markup='').order_by('pk')
+
+    def iter_batches(self, qs, batch_size):
+        last_pk = None
+        while True:
+            batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1].pk
+
+    def rerender_batch(self, model, objects, index, use_cache):
+        by_project = defaultdict(list)
+        for obj in objects:
+            by_project[obj.get_affiliation()].append(obj)
+
+        rendered = {}
+        for project, project_objects in by_project.items():
+            fragments = render_markup_batch(
+                [obj.markup for obj in project_objects], project,
+                use_cache)
+            for obj, fragment in zip(project_objects, fragments):
+                obj.markup_html = fragment
+                rendered[obj.pk] = fragment
+
+        with transaction.atomic():
+            bulk_update_markup_html(model, rendered)
+            ItemReference.objects.update_for_items(objects)
+
+        if index and model in items_index.document_types:
+            document_type = items_index.document_types[model]
+            docs = document_type.data_from_objects(objects)
+            items_index.bulk([document_type.index_op(doc) for doc in docs])
+            invalidate_items([doc['url'] for doc in docs])
+
+    def handle(self, *args, **options):
+        model_names = options['models'] or list(MARKUP_MODELS)
+
+        for model_name in model_names:
+            model = MARKUP_MODELS[model_name]
+            start = time.time()
+            count = 0
+
+            qs = self.get_queryset(model)
+            for objects in self.iter_batches(qs, options['batch_size']):
+                self.rerender_batch(model, objects, options['index'],
+                                    options['use_cache'])
+                count += len(objects)
+
+            self.stdout.write('Re-rendered {} {}(s) in {:.1f}s'.format(
+                count, model_name, time.time() - start))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.4 on 2026-10-18 16:05
+from __future__ import unicode_literals
+
+from django.core.urlresolvers import reverse
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SOURCE_URLS = {
+    'note': lambda obj: reverse(
+        'api:notes-detail', args=[obj.project.slug, obj.id]),
+    'topic': lambda obj: reverse(
+        'api:topics-detail', args=[obj.project.slug, obj.id]),
+    'transcript': lambda obj: reverse(
+        'api:transcripts-detail',
+        args=[obj.document.project.slug, obj.document_id]),
+    'project': lambda obj: reverse('api:projects-detail', args=[obj.slug]),
+}
+
+
+def get_embedded_urls(tree):
+    urls = set()
+    for item_type in ('note', 'topic', 'document'):
+        urls.update(
+            el.attrib['href'] for el in tree.xpath(
+                '//*[contains(@class, "ENInlineReference-{}")]'.format(
+                    item_type)))
+    return urls
+
+
+def create_item_references(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ItemReference = apps.get_model('main', 'ItemReference')
+
+    for model_name, get_url in SOURCE_URLS.items():
+        Model = apps.get_model('main', model_name)
+        source_type = ContentType.objects.get_for_model(Model)
+        references = []
+
+        for obj in Model.objects.exclude(markup_html=None).iterator():
+            source_url = get_url(obj)
+            references += [
+                ItemReference(source_type=source_type, source_id=obj.id,
+                              source_url=source_url, target_url=target_url)
+                for target_url in get_embedded_urls(obj.markup_html)
+            ]
+
+        ItemReference.objects.bulk_create(references, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('main', '0027_auto_20160926_1311'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemReference',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_id', models.PositiveIntegerField()),
+                ('source_url', models.CharField(max_length=255)),
+                ('target_url', models.CharField(db_index=True, max_length=255)),
+                ('source_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='itemreference',
+            unique_together=set([('source_type', 'source_id', 'target_url')]),
+        ),
+        migrations.RunPython(create_item_references,
+                             migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
 from .documents import *
 from .notes import *
 from .topics import *
+from .references import *
@@ -5,13 +5,13 @@ import numbers
 
 from django.conf import settings
 from django.db import models
+from django.dispatch import receiver
 from django.utils.html import conditional_escape
 
-from editorsnotes.search.items.helpers import get_referencing_items
-
 from .. import fields
 from .. import utils
 from ..utils.markup import render_markup
+from .references import ItemReference
 
 
 class CreationMetadata(models.Model):
@@ -81,6 +81,20 @@ class ENMarkup(models.Model):
         return embedded_urls
 
 
+# Connected when models are loaded, so this runs before the search app's
+# post_save receivers, which reindex referenced items from these rows.
+@receiver(models.signals.post_save)
+def update_item_references(sender, instance, **kwargs):
+    if isinstance(instance, ENMarkup):
+        ItemReference.objects.update_for_item(instance)
+
+
+@receiver(models.signals.post_delete)
+def remove_item_references(sender, instance, **kwargs):
+    if isinstance(instance, ENMarkup):
+        ItemReference.objects.remove_for_item(instance)
+
+
 class Administered(object):
     pass
 
@@ -99,7 +113,26 @@ class URLAccessible(object):
 
 class IsReferenced(object):
     def get_referencing_items(self, labels=False):
-        url = self.get_absolute_url()
-        referencing_urls = get_referencing_items(url)
-
-        return referencing_urls
+        if hasattr(self, '_referencing_items_cache'):
+            return self._referencing_items_cache
+
+        return self.find_referencing_items([self])[0]
+
+    @classmethod
+    def find_referencing_items(cls, objects):
+        """
+        Return a list of the URLs of the items referencing each object, found
+        with one query.
+        """
+        urls = [obj.get_absolute_url() for obj in objects]
+        referencing = ItemReference.objects.get_referencing_urls(urls)
+        return [referencing[url] for url in urls]
+
+    @classmethod
+    def prefetch_referencing_items(cls, objects):
+        """
+        Look up the items referencing many objects at once, to be returned by
+        their `get_referencing_items` methods.
+        """
+        for obj, urls in zip(objects, cls.find_referencing_items(objects)):
+            obj._referencing_items_cache = urls
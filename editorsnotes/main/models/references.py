@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict, defaultdict
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+__all__ = ['ItemReference']
+
+
+class ItemReferenceManager(models.Manager):
+    def update_for_item(self, item):
+        """
+        Make the stored references of an item match the items embedded in its
+        markup.
+        """
+        self.update_for_items([item])
+
+    def update_for_items(self, items):
+        """
+        Make the stored references of a batch of items of the same model match
+        the items embedded in their markup, with a few queries for the whole
+        batch.
+        """
+        if not items:
+            return
+
+        source_type = ContentType.objects.get_for_model(items[0].__class__)
+        target_urls = {
+            item.id: set(item.get_referenced_items())
+            for item in items
+        }
+
+        stored_urls = defaultdict(set)
+        stale_ids = []
+
+        existing = self\
+            .filter(source_type=source_type, source_id__in=list(target_urls))\
+            .values_list('id', 'source_id', 'target_url')
+
+        for reference_id, source_id, target_url in existing:
+            if target_url in target_urls[source_id]:
+                stored_urls[source_id].add(target_url)
+            else:
+                stale_ids.append(reference_id)
+
+        if stale_ids:
+            self.filter(id__in=stale_ids).delete()
+
+        self.bulk_create([
+            self.model(source_type=source_type, source_id=item.id,
+                       source_url=item.get_absolute_url(),
+                       target_url=target_url)
+            for item in items
+            for target_url in target_urls[item.id] - stored_urls[item.id]
+        ])
+
+    def remove_for_item(self, item):
+        source_type = ContentType.objects.get_for_model(item.__class__)
+        self.filter(source_type=source_type, source_id=item.id).delete()
+
+    def get_referencing_urls(self, urls):
+        """
+        Get the URLs of the items referencing each of the given item URLs
+        with one query. Returns a dict of sorted lists, keyed by URL.
+        """
+        referencing = defaultdict(list)
+
+        references = self\
+            .filter(target_url__in=urls)\
+            .order_by('source_url')\
+            .values_list('target_url', 'source_url')
+
+        for target_url, source_url in references:
+            referencing[target_url].append(source_url)
+
+        return OrderedDict((url, referencing[url]) for url in urls)
+
+
+class ItemReference(models.Model):
+    """
+    A reference to an item embedded in the markup of another item.
+
+    Both ends are stored as the URLs used in markup, so that the items which
+    reference a given item can be looked up with one indexed query.
+    """
+    source_type = models.ForeignKey(ContentType)
+    source_id = models.PositiveIntegerField()
+    source = GenericForeignKey('source_type', 'source_id')
+    source_url = models.CharField(max_length=255)
+
+    target_url = models.CharField(max_length=255, db_index=True)
+
+    objects = ItemReferenceManager()
+
+    class Meta:
+        app_label = 'main'
+        unique_together = ('source_type', 'source_id', 'target_url')
+
+    def __unicode__(self):
+        return '{} --> {}'.format(self.source_url, self.target_url)
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from collections import defaultdict
+
 from django.contrib.contenttypes.fields import (GenericForeignKey,
                                                 GenericRelation)
 from django.contrib.contenttypes.models import ContentType
@@ -59,9 +61,51 @@ class Topic(LastUpdateMetadata, URLAccessible, ProjectPermissionsMixin,
 
     def get_affiliation(self):
         return self.project
+
+    @classmethod
+    def find_referencing_items(cls, objects):
+        """
+        Items which have been assigned a topic count as referencing it, as
+        well as items which embed it in their markup.
+        """
+        referencing = super(Topic, cls).find_referencing_items(objects)
+        assigned = get_assigned_item_urls(objects)
+
+        return [
+            sorted(set(urls) | set(assigned[topic.id]))
+            for topic, urls in zip(objects, referencing)
+        ]
 reversion.register(Topic)
 
 
+def get_assigned_item_urls(topics):
+    """
+    Get the URLs of the items assigned each of the given topics, with one
+    query for the assignments and one for each type of item assigned.
+    """
+    assignments = TopicAssignment.objects\
+        .filter(topic__in=topics)\
+        .values_list('topic_id', 'content_type_id', 'object_id')
+
+    ids_by_type = defaultdict(set)
+    for topic_id, content_type_id, object_id in assignments:
+        ids_by_type[content_type_id].add(object_id)
+
+    urls_by_object = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for obj in model.objects.select_related('project').filter(pk__in=ids):
+            urls_by_object[(content_type_id, obj.pk)] = obj.get_absolute_url()
+
+    urls = defaultdict(list)
+    for topic_id, content_type_id, object_id in assignments:
+        url = urls_by_object.get((content_type_id, object_id))
+        if url is not None:
+            urls[topic_id].append(url)
+
+    return urls
+
+
 class TopicAssignment(CreationMetadata, ProjectPermissionsMixin):
     """
     An assignment of a topic to any other object, specific to a project.
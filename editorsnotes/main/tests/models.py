@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
 
+from io import StringIO
+
+from lxml import etree
+
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.db import transaction, IntegrityError
 from django.test import TestCase
 
 from editorsnotes.auth.models import Project
 
 from .. import models as main_models
+from ..utils import markup
 
 
 class NoteTestCase(TestCase):
@@ -38,6 +45,66 @@ class NoteTestCase(TestCase):
         self.assertEqual(1, len(topic.assignments.all()))
         self.assertEqual(topic, note.related_topics.all()[0].topic)
 
+    def testReferencingItems(self):
+        topic = main_models.Topic.objects.create(
+            preferred_name='Example',
+            project=self.project,
+            creator=self.user,
+            last_updater=self.user
+        )
+
+        note = main_models.Note.objects.create(
+            title='test note',
+            markup='this note is about @@t{}'.format(topic.id),
+            creator=self.user, last_updater=self.user, project=self.project)
+
+        self.assertEqual(topic.get_referencing_items(),
+                         [note.get_absolute_url()])
+
+        note.markup = 'this note is not about anything'
+        note.save()
+        self.assertEqual(topic.get_referencing_items(), [])
+
+        note.related_topics.create(topic=topic, creator=self.user)
+        self.assertEqual(topic.get_referencing_items(),
+                         [note.get_absolute_url()])
+
+        note.delete()
+        self.assertEqual(main_models.ItemReference.objects.count(), 0)
+
+    def testRerenderMarkup(self):
+        topic = main_models.Topic.objects.create(
+            preferred_name='Example',
+            project=self.project,
+            creator=self.user,
+            last_updater=self.user
+        )
+
+        note = main_models.Note.objects.create(
+            title='test note',
+            markup='this note is about @@t{}'.format(topic.id),
+            creator=self.user, last_updater=self.user, project=self.project)
+
+        # Simulate stale HTML, references and cached rendering, without saving
+        main_models.Note.objects.filter(id=note.id).update(
+            markup_html='<div>stale</div>')
+        main_models.ItemReference.objects.all().delete()
+        items = markup.format_items(
+            markup.scan_transcluded_items(note.markup), self.project)
+        cache.set(markup.get_render_cache_key(note.markup, items, self.project),
+                  '<p>stale</p>')
+
+        call_command('rerender_markup', models=['note'], index=False,
+                     stdout=StringIO())
+
+        note = main_models.Note.objects.get(id=note.id)
+        self.assertIn('Example',
+                      etree.tostring(note.markup_html, encoding='unicode'))
+        self.assertNotIn('stale',
+                         etree.tostring(note.markup_html, encoding='unicode'))
+        self.assertEqual(topic.get_referencing_items(),
+                         [note.get_absolute_url()])
+
     def testEmptyTitle(self):
         empty_title = main_models.Note.objects.create(
             creator=self.user, last_updater=self.user, project=self.project
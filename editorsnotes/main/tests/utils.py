@@ -2,8 +2,9 @@
 
 import json
 import unittest
+import uuid
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from lxml import etree, html
 
@@ -129,6 +130,64 @@ class MarkupUtilsTestCase(TestCase):
         html = markup.render_markup('test', self.project)
         self.assertEqual(etree.tostring(html, encoding='unicode'), '<div><p>test</p></div>')
 
+    def test_renderer_session(self):
+        from ..utils import markup
+
+        markup.renderer_stats.reset()
+        session = markup.get_session()
+
+        markup.render_markup('test {}'.format(uuid.uuid4()), self.project)
+        markup.render_markup('test {}'.format(uuid.uuid4()), self.project)
+
+        self.assertIs(markup.get_session(), session)
+        self.assertEqual(
+            {kind: stats['calls']
+             for kind, stats in markup.renderer_stats.summary().items()},
+            {'render': 2})
+
+    def test_render_cache(self):
+        "Markup should only be rendered again if it or its items change"
+        from ..utils import markup
+
+        topic = main_models.Topic.objects.create(
+            preferred_name='Ryan Shaw',
+            creator=self.user, last_updater=self.user, project=self.project)
+        text = '{} is about @@t{}.'.format(uuid.uuid4(), topic.id)
+
+        markup.renderer_stats.reset()
+
+        first = markup.render_markup(text, self.project)
+        second = markup.render_markup(text, self.project)
+        self.assertEqual(etree.tostring(first), etree.tostring(second))
+        self.assertEqual(markup.renderer_stats.calls['render'], 1)
+
+        topic.preferred_name = 'Ryan B. Shaw'
+        topic.save()
+
+        third = markup.render_markup(text, self.project)
+        self.assertIn('Ryan B. Shaw', etree.tostring(third, encoding='unicode'))
+        self.assertEqual(markup.renderer_stats.calls['render'], 2)
+
+    def test_scan_transcluded_items(self):
+        from ..utils import markup
+
+        text = (
+            '# @@n3\n\n'
+            'About @@t12 and @@t5, citing [@@d7; @@d7] and @@x4.'
+        )
+
+        self.assertEqual(markup.scan_transcluded_items(text), {
+            'note': [3],
+            'topic': [5, 12],
+            'document': [7],
+        })
+        self.assertEqual(
+            markup.scan_transcluded_items(text),
+            {item_type: sorted(int(item_id) for item_id in ids)
+             for item_type, ids in
+             markup.get_transcluded_items(text, self.project).items()
+             if ids})
+
     def test_count_references(self):
         from ..utils import markup, markup_html
 
@@ -180,3 +239,68 @@ class MarkupUtilsTestCase(TestCase):
 
         related_items = markup_html.get_embedded_models(html)
         self.assertEqual(len(related_items['topic']), 1)
+
+
+@override_settings(EDITORSNOTES_MARKUP_RENDERER='python')
+class PythonMarkupRendererTestCase(TestCase):
+    fixtures = ['projects.json']
+
+    def setUp(self):
+        self.project = Project.objects.get(slug='emma')
+        self.user = self.project.members.all()[0]
+
+    def test_render_markup(self):
+        from ..utils import markup
+
+        markup.renderer_stats.reset()
+
+        html = markup.render_markup('test {}'.format(uuid.uuid4()),
+                                    self.project)
+        self.assertEqual(html[0].tag, 'p')
+        self.assertEqual(
+            {kind: stats['calls']
+             for kind, stats in markup.renderer_stats.summary().items()},
+            {'python_render': 1})
+
+    def test_render_references(self):
+        from ..utils import markup, markup_html
+
+        topic = main_models.Topic.objects.create(
+            preferred_name='Ryan Shaw',
+            creator=self.user, last_updater=self.user, project=self.project)
+        document = main_models.Document.objects.create(
+            description='Ryan Shaw, <em>My Big Book of Cool Stuff</em>, 2010.',
+            zotero_data=json.dumps({
+                'itemType': 'book',
+                'title': 'My Big Book of Cool Stuff',
+                'creators': [
+                    {
+                        'creatorType': 'author',
+                        'firstName': 'Ryan',
+                        'lastName': 'Shaw'
+                    }
+                ],
+                'date': '2010'
+            }),
+            creator=self.user, last_updater=self.user, project=self.project)
+
+        html = markup.render_markup(
+            'About @@t{}, citing [@@d{}, p. 5]. `@@t{}`'.format(
+                topic.id, document.id, topic.id),
+            self.project)
+        self.assertEqual(etree.tostring(html, encoding='unicode'), (
+            '<div><p>About '
+            '<a href="/projects/emma/topics/{}/" '
+            'class="ENInlineReference ENInlineReference-topic">'
+            'Ryan Shaw'
+            '</a>, citing <cite>('
+            '<a href="/projects/emma/documents/{}/" '
+            'class="ENInlineReference ENInlineReference-document">'
+            'Shaw 2010'
+            '</a>, p. 5)</cite>. <code>@@t{}</code></p></div>'.format(
+                topic.id, document.id, topic.id)
+        ))
+
+        related_items = markup_html.get_embedded_models(html)
+        self.assertEqual(len(related_items['topic']), 1)
+        self.assertEqual(len(related_items['document']), 1)
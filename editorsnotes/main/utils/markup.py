@@ -1,28 +1,157 @@
 """
-Utilities for interacting with the markup renderer server.
+Utilities for rendering markup, with the markup renderer server or in process
+(see `markup_python`), depending on the EDITORSNOTES_MARKUP_RENDERER setting.
+
+Rendered markup is cached by the content of the request that would be sent to
+the renderer: the markup, the project's URL and the data of the items it
+references. Saving an item whose markup, and whose referenced items, have not
+changed therefore does not make any request to the renderer.
+
+Requests to the renderer go through one session per process, which keeps
+connections to it open between requests. Each request's latency is logged to
+the `editorsnotes.main.utils.markup.timing` logger at the DEBUG level, and
+summed in `renderer_stats`.
 """
 
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
 import json
 import logging
+import os
+import re
+import threading
+import time
 
 from lxml import etree, html
 import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
 
 
 logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger(__name__ + '.timing')
 
+RETRY_STATUSES = (502, 503, 504)
 
-def get_transcluded_items(markup, project):
+RENDERERS = ('http', 'python')
+
+ITEM_REFERENCE_RE = re.compile(r'@@([ntd])(\d+)')
+ITEM_REFERENCE_TYPES = {
+    'n': 'note',
+    't': 'topic',
+    'd': 'document',
+}
+
+
+class RendererStats(object):
+    "Counts of requests to the markup renderer and their latency, by kind."
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = Counter()
+            self.total_ms = Counter()
+            self.max_ms = Counter()
+
+    def record(self, kind, duration_ms):
+        with self.lock:
+            self.calls[kind] += 1
+            self.total_ms[kind] += duration_ms
+            self.max_ms[kind] = max(self.max_ms[kind], duration_ms)
+
+    def summary(self):
+        with self.lock:
+            return {
+                kind: {
+                    'calls': self.calls[kind],
+                    'mean_ms': self.total_ms[kind] / self.calls[kind],
+                    'max_ms': self.max_ms[kind],
+                }
+                for kind in self.calls
+            }
+
+
+renderer_stats = RendererStats()
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def make_session():
+    """
+    Make a session which pools keep-alive connections to the renderer, and
+    retries requests which fail to connect or get a gateway error. Rendering
+    has no side effects, so POST requests are safe to retry.
+    """
+    retry = Retry(
+        total=settings.EDITORSNOTES_MARKUP_RENDERER_MAX_RETRIES,
+        backoff_factor=0.1,
+        status_forcelist=RETRY_STATUSES,
+        method_whitelist=frozenset(['POST']))
+
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.EDITORSNOTES_MARKUP_RENDERER_POOL_SIZE,
+        max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """
+    Get this process's renderer session. Processes forked after a session was
+    made (e.g. by parallel index rebuilds) make their own, rather than sharing
+    its connections.
+    """
+    global _session, _session_pid
+
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = make_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+def post_to_renderer(kind, payload, params=None):
+    "Send markup to the renderer, and record how long it took to respond."
     url = settings.EDITORSNOTES_MARKUP_RENDERER_URL
+    start = time.time()
+
+    try:
+        resp = get_session().post(
+            url, params=params, json=payload,
+            timeout=settings.EDITORSNOTES_MARKUP_RENDERER_TIMEOUT)
+    except requests.RequestException as err:
+        raise ValueError('Could not reach markup renderer server: {}'.format(
+            err))
+    finally:
+        duration_ms = (time.time() - start) * 1000
+        renderer_stats.record(kind, duration_ms)
+        timing_logger.debug('Markup renderer %s request took %.1fms', kind,
+                            duration_ms)
+
+    return resp
+
+
+def get_transcluded_items(markup, project):
     params = {'only_transcluded_items': 1}
     payload = {
         'data': markup,
         'url_root': project.get_absolute_url()
     }
 
-    resp = requests.post(url, params=params, json=payload)
+    resp = post_to_renderer('transcluded_items', payload, params=params)
 
     try:
         items = resp.json()
@@ -32,10 +161,27 @@ def get_transcluded_items(markup, project):
     return items
 
 
+def scan_transcluded_items(markup):
+    """
+    Find the IDs of the items referenced in markup (as `@@t12` and so on)
+    without asking the renderer, in the same form as `get_transcluded_items`.
+
+    This may find references the renderer would ignore, like ones in code
+    blocks, but data for extra items is harmless: the renderer only uses the
+    items it finds references to.
+    """
+    items = defaultdict(set)
+
+    for type_code, item_id in ITEM_REFERENCE_RE.findall(markup):
+        items[ITEM_REFERENCE_TYPES[type_code]].add(int(item_id))
+
+    return {item_type: sorted(ids) for item_type, ids in items.items()}
+
+
 def qs_from_ids(Model, project, ids):
     if not ids:
         return None
-    return Model.objects.filter(project=project, id__in=ids)
+    return Model.objects.filter(project=project, id__in=ids).order_by('id')
 
 
 def format_items(items_dict, project):
@@ -73,15 +219,35 @@ def format_items(items_dict, project):
     return items
 
 
-def get_rendered_markup(markup, items, project):
-    url = settings.EDITORSNOTES_MARKUP_RENDERER_URL
+def get_renderer(renderer=None):
+    renderer = renderer or settings.EDITORSNOTES_MARKUP_RENDERER
+    if renderer not in RENDERERS:
+        raise ImproperlyConfigured(
+            'EDITORSNOTES_MARKUP_RENDERER must be one of: {}'.format(
+                ', '.join(RENDERERS)))
+    return renderer
+
+
+def get_rendered_markup(markup, items, project, renderer=None):
+    """
+    Render markup with the data of the items it references, with the
+    configured renderer unless another is given.
+    """
+    if get_renderer(renderer) == 'python':
+        from .markup_python import render
+
+        start = time.time()
+        rendered = render(markup, items, project.get_absolute_url())
+        renderer_stats.record('python_render', (time.time() - start) * 1000)
+        return rendered
+
     payload = {
         'data': markup,
         'url_root': project.get_absolute_url()
     }
     payload.update(items)
 
-    resp = requests.post(url, json=payload)
+    resp = post_to_renderer('render', payload)
 
     if resp.status_code != 200:
         logger.critical('Failed to parse markup. Payload was:\n\n{}\n'.format(
@@ -94,11 +260,99 @@ def get_rendered_markup(markup, items, project):
     return rendered
 
 
+def get_render_cache_key(markup, items, project):
+    """
+    Get the key to cache the rendering of markup under, which is a hash of
+    everything that is sent to the renderer.
+    """
+    renderer = get_renderer()
+    content = json.dumps([
+        (settings.EDITORSNOTES_MARKUP_RENDERER_URL if renderer == 'http'
+         else renderer),
+        project.get_absolute_url(),
+        markup,
+        items,
+    ], sort_keys=True)
+    return 'markup:render:' + sha1(content.encode('utf-8')).hexdigest()
+
+
+def select_items(items, items_dict):
+    """
+    Pick the data of the items with the IDs in `items_dict` out of items
+    formatted by `format_items`, in the same form as `format_items` would
+    return for `items_dict` alone.
+    """
+    selected = {}
+
+    for item_type, ids in items_dict.items():
+        by_id = {item['id']: item for item in items.get(item_type, [])}
+        found = [by_id[item_id] for item_id in sorted(ids) if item_id in by_id]
+        if found:
+            selected[item_type] = found
+
+    return selected
+
+
+def render_with_items(markup, items, project, use_cache=True):
+    """
+    Render markup along with the data of the items it references. If
+    `use_cache` is false, the markup is rendered even if a rendering of it is
+    cached, and the cached rendering is replaced.
+    """
+    cache_key = get_render_cache_key(markup, items, project)
+    markup_html = cache.get(cache_key) if use_cache else None
+
+    if markup_html is None:
+        markup_html = get_rendered_markup(markup, items, project)
+        markup_html = markup_html.strip().rstrip()
+        cache.set(cache_key, markup_html,
+                  settings.EDITORSNOTES_MARKUP_RENDER_CACHE_TIMEOUT)
+
+    return html.fragment_fromstring(markup_html, create_parent='div')
+
+
 def render_markup(markup, project):
-    items_dict = get_transcluded_items(markup, project)
+    if settings.EDITORSNOTES_MARKUP_PRESCAN or get_renderer() == 'python':
+        items_dict = scan_transcluded_items(markup)
+    else:
+        items_dict = get_transcluded_items(markup, project)
+
     items = format_items(items_dict, project)
-    markup_html = get_rendered_markup(markup, items, project)
+    return render_with_items(markup, items, project)
 
-    markup_html = markup_html.strip().rstrip()
 
-    return html.fragment_fromstring(markup_html, create_parent='div')
+def render_markup_batch(markups, project, use_cache=True):
+    """
+    Render a list of markup documents from one project, returning the
+    rendered fragments in the same order. `use_cache` is passed on to
+    `render_with_items`.
+
+    The items referenced by every document are found by scanning them, and
+    loaded with one query per item type for the whole batch. Documents which
+    need rendering are sent to the renderer concurrently, over as
+    many connections as the session keeps open, or rendered one after
+    another by the in-process renderer.
+    """
+    items_dicts = [scan_transcluded_items(markup) for markup in markups]
+
+    all_ids = defaultdict(set)
+    for items_dict in items_dicts:
+        for item_type, ids in items_dict.items():
+            all_ids[item_type].update(ids)
+
+    all_items = format_items(all_ids, project)
+
+    def render(args):
+        markup, items_dict = args
+        return render_with_items(
+            markup, select_items(all_items, items_dict), project, use_cache)
+
+    # Rendering in process is CPU bound, so threads would not help
+    if get_renderer() == 'python':
+        return list(map(render, zip(markups, items_dicts)))
+
+    workers = min(settings.EDITORSNOTES_MARKUP_RENDERER_POOL_SIZE,
+                  len(markups)) or 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(render, zip(markups, items_dicts)))
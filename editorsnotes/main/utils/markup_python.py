@@ -0,0 +1,192 @@
+"""
+An in-process renderer for Working Notes markup, producing the same HTML as
+the markup renderer server.
+
+Markup is rendered as CommonMark, then references to items in the rendered
+text are replaced with links to them. `@@n12`, `@@t12` and `@@d12` link to a
+note, topic or document, labelled with its title, preferred name or a short
+citation. Bracketed document references like `[@@d12, p. 5; @@d13]` become
+parenthesized citations. References in links and code are left alone, as are
+references to items which were not given.
+"""
+
+import re
+
+from lxml import etree, html
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import CommonMark
+except ImportError:
+    CommonMark = None
+
+from .markup import ITEM_REFERENCE_TYPES
+
+
+REFERENCE_RE = re.compile(
+    r'\[(?P<citation>\s*@@d\d+[^\]]*)\]|@@(?P<type>[ntd])(?P<id>\d+)')
+CITATION_PART_RE = re.compile(r'\s*@@d(\d+)(.*)', re.DOTALL)
+YEAR_RE = re.compile(r'\d{4}')
+
+SKIPPED_TAGS = ('a', 'code', 'pre')
+
+
+def format_authors(creators):
+    names = [
+        creator.get('lastName') or creator.get('name')
+        for creator in creators
+        if creator.get('creatorType', 'author') == 'author'
+    ]
+    names = [name for name in names if name]
+
+    if not names:
+        return None
+    if len(names) == 1:
+        return names[0]
+    if len(names) == 2:
+        return '{} and {}'.format(*names)
+    if len(names) == 3:
+        return '{}, {}, and {}'.format(*names)
+    return '{} et al.'.format(names[0])
+
+
+def citation_text(document):
+    "Return a short author-date citation for a document, like 'Shaw 2010'."
+    data = document.get('zotero_data') or {}
+    authors = format_authors(data.get('creators') or [])
+
+    if authors is None:
+        description = html.fragment_fromstring(document['description'],
+                                               create_parent='div')
+        return description.text_content().strip()
+
+    year = YEAR_RE.search(data.get('date') or '')
+    return '{} {}'.format(authors, year.group() if year else 'n.d.')
+
+
+def item_label(item_type, item):
+    if item_type == 'note':
+        return item['title']
+    if item_type == 'topic':
+        return item['preferred_name']
+    return citation_text(item)
+
+
+def make_link(item_type, item, url_root):
+    link = html.Element('a')
+    link.set('href', '{}{}s/{}/'.format(url_root, item_type, item['id']))
+    link.set('class', 'ENInlineReference ENInlineReference-{}'.format(
+        item_type))
+    link.text = item_label(item_type, item)
+    return link
+
+
+def make_citation(content, items, url_root):
+    """
+    Make a <cite> element for the content of a bracketed citation, or return
+    None if any document in it was not given.
+    """
+    documents = items.get('document', {})
+    cite = html.Element('cite')
+    cite.text = '('
+
+    parts = content.split(';')
+    for i, part in enumerate(parts):
+        match = CITATION_PART_RE.match(part)
+        if not match or int(match.group(1)) not in documents:
+            return None
+
+        link = make_link('document', documents[int(match.group(1))], url_root)
+        link.tail = match.group(2).rstrip() + (
+            '; ' if i < len(parts) - 1 else ')')
+        cite.append(link)
+
+    return cite
+
+
+def split_references(text, items, url_root):
+    """
+    Split text around the references in it. Returns the text before the
+    first reference, and a list of (element, following text) pairs.
+    """
+    leading = None
+    elements = []
+    position = 0
+
+    for match in REFERENCE_RE.finditer(text):
+        if match.group('citation') is not None:
+            element = make_citation(match.group('citation'), items, url_root)
+        else:
+            item_type = ITEM_REFERENCE_TYPES[match.group('type')]
+            item = items.get(item_type, {}).get(int(match.group('id')))
+            element = item and make_link(item_type, item, url_root)
+
+        if element is None:
+            continue
+
+        if elements:
+            elements[-1][1] += text[position:match.start()]
+        else:
+            leading = text[position:match.start()]
+
+        elements.append([element, ''])
+        position = match.end()
+
+    if not elements:
+        return text, []
+
+    elements[-1][1] += text[position:]
+    return leading, elements
+
+
+def insert_references(parent, items, url_root):
+    "Replace references in the text within an element with links."
+    children = list(parent)
+
+    if parent.text:
+        parent.text, elements = split_references(parent.text, items, url_root)
+        for i, (element, tail) in enumerate(elements):
+            element.tail = tail
+            parent.insert(i, element)
+
+    for child in children:
+        if child.tag not in SKIPPED_TAGS:
+            insert_references(child, items, url_root)
+
+        if child.tail:
+            child.tail, elements = split_references(child.tail, items,
+                                                    url_root)
+            index = parent.index(child)
+            for i, (element, tail) in enumerate(elements):
+                element.tail = tail
+                parent.insert(index + i + 1, element)
+
+
+def render(markup, items, url_root):
+    """
+    Render markup to HTML, given the data of the items it references as
+    returned by `markup.format_items`.
+    """
+    if CommonMark is None:
+        raise ImproperlyConfigured(
+            'The "python" markup renderer requires the CommonMark package.')
+
+    rendered = CommonMark.HtmlRenderer().render(
+        CommonMark.Parser().parse(markup))
+
+    if not rendered.strip():
+        return ''
+
+    tree = html.fragment_fromstring(rendered, create_parent='div')
+    items_by_id = {
+        item_type: {item['id']: item for item in type_items}
+        for item_type, type_items in items.items()
+    }
+    insert_references(tree, items_by_id, url_root)
+
+    # Serialize the contents of the wrapping <div>, without the <div> itself.
+    serialized = etree.tostring(tree, encoding='unicode')
+    if serialized.endswith('/>'):
+        return ''
+    return serialized[len('<div>'):-len('</div>')]
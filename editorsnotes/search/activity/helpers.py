@@ -2,21 +2,75 @@
 Functions for the activity index.
 """
 
-import json
-from collections import OrderedDict
+from collections import defaultdict
 
-from rest_framework.renderers import JSONRenderer
+from django.contrib.contenttypes.models import ContentType
 
 from .. import activity_index
+from ..index import encode_bulk_body, send_bulk_request
+from ..utils import to_primitive
 
 
-def handle_activity_edit(instance, refresh=True):
+def serialize_activities(activities, many=False):
     from editorsnotes.api.serializers import ActivitySerializer
 
-    serializer = ActivitySerializer(instance)
-    data = json.loads(JSONRenderer().render(serializer.data).decode('utf-8'),
-                      object_pairs_hook=OrderedDict)
+    serializer = ActivitySerializer(activities, many=many)
+    return to_primitive(serializer.data)
+
+
+def handle_activity_edit(instance, refresh=True):
+    data = serialize_activities(instance)
 
     activity_index.es.index(
         activity_index.name, 'activity', {'id': instance.id, 'data': data},
-        refresh=refresh)
+        id=instance.id, refresh=refresh)
+
+
+def prefetch_content_objects(activities):
+    """
+    Load the objects that a list of activities refer to with one query for
+    each content type, instead of one (or more) for every activity.
+
+    Non-null foreign keys of the objects are selected as well, since they are
+    needed to build the objects' URLs.
+    """
+    from editorsnotes.auth.models import LogActivity
+
+    ids_by_type = defaultdict(set)
+    for activity in activities:
+        ids_by_type[activity.content_type_id].add(activity.object_id)
+
+    objects = {}
+    for content_type_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        for obj in model._base_manager.select_related().filter(pk__in=ids):
+            objects[(content_type_id, obj.pk)] = obj
+
+    for activity in activities:
+        setattr(activity, LogActivity.content_object.cache_attr,
+                objects.get((activity.content_type_id, activity.object_id)))
+
+    return activities
+
+
+def index_activities(activities, index_name=None, refresh=False):
+    """
+    Serialize a batch of activities and send them to the activity index in
+    one bulk request. Returns the number of bytes sent.
+    """
+    index_name = index_name or activity_index.name
+
+    prefetch_content_objects(activities)
+    data = serialize_activities(activities, many=True)
+
+    body = encode_bulk_body(activity_index.es, (
+        ({'index': {'_index': index_name, '_type': 'activity',
+                    '_id': activity.id}},
+         {'id': activity.id, 'data': activity_data})
+        for activity, activity_data in zip(activities, data)
+    ))
+    send_bulk_request(activity_index.es, index_name, body, refresh=refresh)
+
+    return len(body.encode('utf-8'))
@@ -0,0 +1,137 @@
+"""
+Rebuilding the activity index in batches, optionally with a pool of worker
+processes.
+
+Log entries are read in primary key order, with keyset pagination, and each
+batch is serialized and sent to Elasticsearch with one bulk request. Workers
+each take a range of primary keys, as when rebuilding the items index.
+"""
+
+from multiprocessing import Pool
+
+import requests
+
+from ..index import RateLimiter
+from ..items.parallel import RangeProgress, close_connections, get_pk_ranges
+from .. import activity_index
+from .helpers import index_activities
+
+
+# Set in each worker process by `init_worker`.
+throttle = None
+
+
+def get_queryset():
+    from editorsnotes.auth.models import LogActivity
+    return LogActivity.objects\
+        .select_related('project', 'user', 'content_type')\
+        .order_by('pk')
+
+
+def iter_activity_batches(qs, chunk_size=500, start_after=None):
+    "Yield lists of activities from a queryset in primary key order."
+    last_pk = start_after
+
+    while True:
+        batch_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+        batch = list(batch_qs[:chunk_size])
+        if not batch:
+            break
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def index_all(index_name=None, chunk_size=500, start_after=None,
+              on_batch=None, throttle=None):
+    """
+    Index every activity after the primary key `start_after`, if given.
+    `on_batch` is called with the last primary key of each batch once it has
+    been indexed. Returns the number of documents and bytes sent.
+    """
+    doc_count = 0
+    byte_count = 0
+
+    for batch in iter_activity_batches(get_queryset(), chunk_size,
+                                       start_after):
+        body_size = index_activities(batch, index_name)
+        doc_count += len(batch)
+        byte_count += body_size
+        if throttle is not None:
+            throttle.wait(len(batch), body_size)
+        if on_batch is not None:
+            on_batch(batch[-1].pk)
+
+    return doc_count, byte_count
+
+
+def init_worker(docs_per_second=None, bytes_per_second=None):
+    global throttle
+
+    close_connections()
+    activity_index.es.session = requests.session()
+
+    if docs_per_second or bytes_per_second:
+        throttle = RateLimiter(docs_per_second, bytes_per_second)
+
+
+def index_pk_range(task):
+    """
+    Index all activities within a range of primary keys. Returns the start of
+    the range, and the number of documents and bytes sent.
+    """
+    index_name, start, end, chunk_size = task
+    qs = get_queryset().filter(pk__gte=start, pk__lt=end)
+
+    doc_count = 0
+    byte_count = 0
+
+    for batch in iter_activity_batches(qs, chunk_size):
+        body_size = index_activities(batch, index_name)
+        doc_count += len(batch)
+        byte_count += body_size
+        if throttle is not None:
+            throttle.wait(len(batch), body_size)
+
+    return start, doc_count, byte_count
+
+
+def rebuild_parallel(workers, index_name=None, range_size=10000,
+                     chunk_size=500, start_after=None, on_progress=None,
+                     docs_per_second=None, bytes_per_second=None):
+    """
+    Index every activity using a pool of `workers` processes. `on_progress`,
+    if given, is called with the primary key up to which every activity has
+    been indexed. Returns the number of documents and bytes sent.
+    """
+    from editorsnotes.auth.models import LogActivity
+
+    ranges = get_pk_ranges(LogActivity, range_size, start_after)
+    progress = RangeProgress(ranges)
+    tasks = [
+        (index_name or activity_index.name, start, end, chunk_size)
+        for start, end in ranges
+    ]
+
+    doc_count = 0
+    byte_count = 0
+
+    close_connections()
+
+    pool = Pool(workers, initializer=init_worker, initargs=(
+        docs_per_second and docs_per_second / workers,
+        bytes_per_second and bytes_per_second / workers))
+
+    try:
+        for start, range_docs, range_bytes in \
+                pool.imap_unordered(index_pk_range, tasks):
+            doc_count += range_docs
+            byte_count += range_bytes
+
+            last_pk = progress.finish(start)
+            if last_pk is not None and on_progress is not None:
+                on_progress(last_pk)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return doc_count, byte_count
@@ -1,11 +1,207 @@
 from collections import OrderedDict
+from datetime import datetime
 import json
+import logging
+import time
 
 from django.conf import settings
 
 from elasticsearch_dsl import Search
 from pyelasticsearch import ElasticSearch
-from pyelasticsearch.exceptions import InvalidJsonResponseError
+from pyelasticsearch.exceptions import (ElasticHttpError,
+                                        ElasticHttpNotFoundError,
+                                        InvalidJsonResponseError)
+
+
+logger = logging.getLogger(__name__)
+
+# Responses with these statuses mean that Elasticsearch is overloaded, and
+# that the request should be retried after waiting a while.
+REJECTED_STATUSES = (429, 503)
+BACKOFF_INITIAL = 1
+BACKOFF_MAX = 60
+
+
+class RateLimiter(object):
+    """
+    Limits the rate at which documents and/or bytes are sent to Elasticsearch.
+
+    Call `wait` after each request with the number of documents and bytes
+    sent. It sleeps for as long as is needed to keep the average rate since
+    the limiter was created under the limits.
+    """
+    def __init__(self, docs_per_second=None, bytes_per_second=None):
+        self.docs_per_second = docs_per_second
+        self.bytes_per_second = bytes_per_second
+        self.started = time.time()
+        self.doc_count = 0
+        self.byte_count = 0
+
+    def wait(self, doc_count, byte_count):
+        self.doc_count += doc_count
+        self.byte_count += byte_count
+
+        target = 0
+        if self.docs_per_second:
+            target = max(target, self.doc_count / self.docs_per_second)
+        if self.bytes_per_second:
+            target = max(target, self.byte_count / self.bytes_per_second)
+
+        delay = target - (time.time() - self.started)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def is_rejection(err):
+    "Whether an exception means that ES was too busy to handle a request."
+    if isinstance(err, ElasticHttpError):
+        return err.status_code in REJECTED_STATUSES
+    if isinstance(err, InvalidJsonResponseError):
+        return err.response.status_code in REJECTED_STATUSES
+    return False
+
+
+def back_off(attempt):
+    delay = min(BACKOFF_INITIAL * 2 ** attempt, BACKOFF_MAX)
+    logger.warning('Elasticsearch is overloaded; retrying in {}s'.format(delay))
+    time.sleep(delay)
+
+
+def split_bulk_body(body):
+    """
+    Split an encoded bulk request body into the lines for each operation, in
+    the same order as the items of the bulk API's response.
+    """
+    operations = []
+    lines = iter(body.splitlines(True))
+
+    for action_line in lines:
+        action = json.loads(action_line)
+        if 'delete' in action:
+            operations.append(action_line)
+        else:
+            operations.append(action_line + next(lines))
+
+    return operations
+
+
+def encode_bulk_body(es, operations):
+    """
+    Encode a batch of operations as a request body for the bulk API.
+
+    `operations` should be an iterable of (action, source) pairs, where
+    `action` is a bulk action such as `{'index': {'_id': ...}}` and `source` is
+    the document body, or None for actions without one (like deletions).
+    """
+    body_bits = []
+
+    for action, source in operations:
+        body_bits.append(es._encode_json(action))
+        if source is not None:
+            body_bits.append(es._encode_json(source))
+
+    if not body_bits:
+        return ''
+
+    return '\n'.join(body_bits) + '\n'
+
+
+def send_bulk_request(es, index_name, body, refresh=False, max_retries=5):
+    """
+    Send an encoded request body to the bulk API. The index is refreshed at
+    most once, after the whole batch has been applied.
+
+    If ES rejects the request, or some of the operations in it, because it is
+    overloaded, the rejected part is retried up to `max_retries` times, with
+    an exponentially growing delay between attempts.
+    """
+    if not body:
+        return None
+
+    attempt = 0
+
+    while True:
+        try:
+            resp = es.send_request('POST', [index_name, '_bulk'], body,
+                                   encode_body=False,
+                                   query_params={'refresh': refresh})
+        except (ElasticHttpError, InvalidJsonResponseError) as err:
+            if attempt >= max_retries or not is_rejection(err):
+                raise
+            back_off(attempt)
+            attempt += 1
+            continue
+
+        rejected = []
+
+        if resp.get('errors'):
+            operations = split_bulk_body(body)
+            for operation, item in zip(operations, resp['items']):
+                action, result = list(item.items())[0]
+                status = result.get('status')
+                if status in REJECTED_STATUSES and attempt < max_retries:
+                    rejected.append(operation)
+                    continue
+                if action == 'delete' and status == 404:
+                    continue
+                if 'error' in result:
+                    logger.error('Failed to {} document {}: {}'.format(
+                        action, result.get('_id'), result['error']))
+
+        if not rejected:
+            return resp
+
+        body = ''.join(rejected)
+        back_off(attempt)
+        attempt += 1
+
+
+def scan_search(es, index_name, query, doc_type=None, size=500,
+                scroll='5m'):
+    """
+    Iterate over every hit matching a query using the scan and scroll APIs,
+    without scoring or sorting.
+    """
+    resp = es.search(query, index=index_name, doc_type=doc_type,
+                     es_search_type='scan', es_scroll=scroll, size=size)
+
+    while True:
+        resp = es.send_request('GET', ['_search', 'scroll'],
+                               resp['_scroll_id'], encode_body=False,
+                               query_params={'scroll': scroll})
+        hits = resp['hits']['hits']
+        if not hits:
+            break
+        for hit in hits:
+            yield hit
+
+
+def multi_search(es, index_name, searches):
+    """
+    Run several searches in one request to the multi search API. `searches`
+    should be a list of (doc_type, body) pairs, where `doc_type` can be None
+    to search every type. Returns the responses in the same order.
+    """
+    if not searches:
+        return []
+
+    body_bits = []
+    for doc_type, body in searches:
+        header = {'index': index_name}
+        if doc_type is not None:
+            header['type'] = doc_type
+        body_bits.append(es._encode_json(header))
+        body_bits.append(es._encode_json(body))
+
+    resp = es.send_request('GET', [index_name, '_msearch'],
+                           '\n'.join(body_bits) + '\n', encode_body=False)
+
+    for response in resp['responses']:
+        if 'error' in response:
+            raise ElasticHttpError(response.get('status', 500),
+                                   response['error'])
+
+    return resp['responses']
 
 
 class OrderedResponseElasticSearch(ElasticSearch):
@@ -49,6 +245,10 @@ class OrderedResponseElasticSearch(ElasticSearch):
 class ElasticSearchIndex(object):
     """
     Base index definition which should be inherited by other indices.
+
+    The index's name is an alias which points to a versioned physical index.
+    This allows an index to be rebuilt in the background under a new physical
+    name, then swapped in atomically.
     """
     name = None
 
@@ -71,23 +271,126 @@ class ElasticSearchIndex(object):
     def initialize(self):
         if not self.exists():
             self.create()
+            return
+
+        missing = self.get_missing_analysis()
+        if missing:
+            # Analysis settings can only be added to a closed index, so an
+            # index in use is left alone until it is rebuilt.
+            logger.critical(
+                'The index {} is missing analysis settings used by its '
+                'mappings ({}), so its mappings were not updated. Run '
+                '`rebuild_es_index` to build a new index with them.'.format(
+                    self.name, ', '.join(sorted(missing))))
+            return
+
         self.put_all_mappings()
 
-    def put_all_mappings(self):
+    def get_missing_analysis(self, index_name=None):
+        """
+        Return the names of the analyzers, tokenizers and filters in this
+        index's settings which the existing index lacks.
+        """
+        analysis = self.get_settings()\
+            .get('settings', {}).get('index', {}).get('analysis')
+        if not analysis:
+            return set()
+
+        missing = set()
+        resp = self.es.get_settings(index_name or self.name)
+        for data in resp.values():
+            existing = data['settings'].get('index', {}).get('analysis', {})
+            for key, definitions in analysis.items():
+                missing.update(name for name in definitions
+                               if name not in existing.get(key, {}))
+
+        return missing
+
+    def put_all_mappings(self, index_name=None):
         for doc_type, mapping in list(self.get_mappings().items()):
-            self.es.put_mapping(self.name, doc_type, mapping)
+            self.es.put_mapping(index_name or self.name, doc_type, mapping)
 
-    def exists(self):
+    def exists(self, index_name=None):
         server_url, _ = self.es.servers.get()
-        resp = self.es.session.head(server_url + '/' + self.name)
+        resp = self.es.session.head(
+            server_url + '/' + (index_name or self.name))
         return resp.status_code == 200
 
+    def get_aliased_indices(self):
+        "Return the names of the physical indices behind this index's alias."
+        try:
+            resp = self.es.send_request('GET', ['_alias', self.name])
+        except ElasticHttpNotFoundError:
+            return []
+        return list(resp.keys())
+
+    def create_versioned(self):
+        """
+        Create a new, empty physical index with this index's settings and
+        mappings, without pointing the alias to it. Returns its name.
+        """
+        index_name = '{}-{}'.format(
+            self.name, datetime.utcnow().strftime('%Y%m%d%H%M%S%f'))
+        self.es.create_index(index_name, self.get_settings())
+        self.put_all_mappings(index_name)
+        return index_name
+
+    def swap_alias(self, index_name):
+        """
+        Atomically point this index's alias to the given physical index, then
+        delete the physical indices it previously pointed to.
+        """
+        old_indices = self.get_aliased_indices()
+
+        # An index created before aliases were used has to be removed before
+        # its name can be used as an alias.
+        if not old_indices and self.exists():
+            self.es.delete_index(self.name)
+
+        actions = [
+            {'remove': {'index': old_index, 'alias': self.name}}
+            for old_index in old_indices
+            if old_index != index_name
+        ]
+        actions.append({'add': {'index': index_name, 'alias': self.name}})
+        self.es.update_aliases({'actions': actions})
+
+        stale_indices = [name for name in old_indices if name != index_name]
+        if stale_indices:
+            self.es.delete_index(stale_indices)
+
     def create(self):
-        return self.es.create_index(self.name, self.get_settings())
+        from .items.cache import invalidate_all_items
+
+        index_name = self.create_versioned()
+        self.swap_alias(index_name)
+        invalidate_all_items()
+        return index_name
 
     def delete(self):
-        return self.es.delete_index(self.name)
+        from .items.cache import invalidate_all_items
+
+        ret = self.es.delete_index(self.get_aliased_indices() or self.name)
+        invalidate_all_items()
+        return ret
 
     def make_search(self):
         "Return an elasticsearch_dsl Search object for this index"
         return Search(using=self.es, index=self.name)
+
+    def multi_search(self, searches):
+        "Run a list of (doc_type, body) searches in one request."
+        return multi_search(self.es, self.name, searches)
+
+    def scan(self, query, doc_type=None, **kwargs):
+        return scan_search(self.es, self.name, query, doc_type, **kwargs)
+
+    def bulk_body(self, operations):
+        return encode_bulk_body(self.es, operations)
+
+    def send_bulk(self, body, refresh=False):
+        return send_bulk_request(self.es, self.name, body, refresh=refresh)
+
+    def bulk(self, operations, refresh=False):
+        "Send a batch of (action, source) operations to the bulk API."
+        return self.send_bulk(self.bulk_body(operations), refresh=refresh)
@@ -48,14 +48,45 @@ class ItemsIndex(ElasticSearchIndex):
             tokenizer='standard',
             filter=['standard', 'lowercase', shingle_filter])
 
+        # Every prefix of each word is indexed for autocompletion, while
+        # queries are only split into words.
+        autocomplete_filter = analysis.token_filter(
+            'filter_autocomplete',
+            'edge_ngram',
+            min_gram=1,
+            max_gram=20)
+
+        autocomplete_analyzer = analysis.analyzer(
+            'analyzer_autocomplete',
+            tokenizer='standard',
+            filter=['standard', 'lowercase', 'asciifolding',
+                    autocomplete_filter])
+
+        autocomplete_search_analyzer = analysis.analyzer(
+            'analyzer_autocomplete_search',
+            tokenizer='standard',
+            filter=['standard', 'lowercase', 'asciifolding'])
+
+        analysis_definition = {}
+        for analyzer in (shingle_analyzer, autocomplete_analyzer,
+                         autocomplete_search_analyzer):
+            for key, definitions in analyzer.get_analysis_definition().items():
+                analysis_definition.setdefault(key, {}).update(definitions)
+
         return {
             'settings': {
                 'index': {
-                    'analysis': shingle_analyzer.get_analysis_definition()
+                    'analysis': analysis_definition
                 }
             }
         }
 
+    def get_document_type_by_label(self, type_label):
+        for document_type in self.document_types.values():
+            if document_type.type_label == type_label:
+                return document_type
+        raise KeyError('No document type with label "{}"'.format(type_label))
+
     def make_search_for_model(self, model):
         type_label = self.document_types[model].type_label
         return self.make_search().doc_type(type_label)
@@ -0,0 +1,189 @@
+"""
+Caching of indexed item data embedded in API responses.
+
+Serialized items fetched from the index are kept in a bounded, in-process LRU
+cache, keyed by URL path. Each cached entry is stored along with a version
+token for its item, kept in Django's cache so that it is shared between
+processes. Writing an item to the index replaces its token, which makes every
+process's cached copy stale. Rebuilding the index replaces a token shared by
+all items instead.
+
+Search results for lists of a project's items are cached in Django's cache,
+keyed by a version token for the project which is replaced whenever one of its
+items is written to the index. Another token is replaced whenever any item is
+written, for results which span every project.
+"""
+
+from collections import OrderedDict
+from hashlib import md5
+import json
+import threading
+from urllib.parse import urlparse
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+GENERATION_KEY = 'search:item-generation'
+ITEMS_VERSION_KEY = 'search:items-version'
+
+
+def version_key(path):
+    return 'search:item-version:' + md5(path.encode('utf-8')).hexdigest()
+
+
+def get_versions(paths):
+    """
+    Get the current version token of each item path. Items without one (never
+    written, or evicted from the cache) are given a new one.
+    """
+    keys = {path: version_key(path) for path in paths}
+    versions = cache.get_many(list(keys.values()) + [GENERATION_KEY])
+
+    missing = {
+        key: uuid.uuid4().hex
+        for key in list(keys.values()) + [GENERATION_KEY]
+        if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+
+    generation = versions[GENERATION_KEY]
+
+    return {
+        path: generation + versions[key]
+        for path, key in keys.items()
+    }
+
+
+def get_generation():
+    return get_token(GENERATION_KEY)
+
+
+def invalidate_items(urls):
+    """
+    Replace the version tokens of the items with the given URLs, of their
+    projects, and of all items.
+    """
+    if urls:
+        keys = (
+            [version_key(urlparse(url).path) for url in urls] +
+            [project_version_key(slug) for slug in get_project_slugs(urls)] +
+            [ITEMS_VERSION_KEY]
+        )
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def invalidate_all_items():
+    "Make every cached item stale, e.g. after the index has been rebuilt."
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def get_project_slugs(urls):
+    "Get the slugs of the projects of the items with the given URLs."
+    from .helpers import get_item_url_patterns
+
+    slugs = set()
+    for url in urls:
+        path = urlparse(url).path
+        for pattern, doc_type in get_item_url_patterns():
+            match = pattern.match(path)
+            if match:
+                slugs.add(match.group('project_slug'))
+                break
+
+    return slugs
+
+
+def project_version_key(slug):
+    return 'search:project-version:' + slug
+
+
+def get_token(key):
+    """
+    Get the version token stored under a key, storing a new one if there
+    isn't one.
+    """
+    token = cache.get(key)
+    if token is None:
+        token = uuid.uuid4().hex
+        cache.add(key, token, None)
+        token = cache.get(key, token)
+    return token
+
+
+def get_project_version(slug):
+    "Get the version token of a project's items."
+    return get_token(project_version_key(slug))
+
+
+def get_items_version():
+    "Get the version token of all items."
+    return get_token(ITEMS_VERSION_KEY)
+
+
+def get_search_cache_key(slug, search):
+    """
+    Get the key under which to cache the results of a search for items in a
+    project. The key changes whenever the project's items change.
+    """
+    query = json.dumps(search.to_dict(), sort_keys=True)
+    return 'search:results:{}:{}:{}:{}'.format(
+        slug, get_project_version(slug), get_generation(),
+        md5(query.encode('utf-8')).hexdigest())
+
+
+class LRUCache(object):
+    """
+    A thread-safe mapping which holds at most `max_size` entries, discarding
+    the least recently used ones first.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key not in self.entries:
+                return default
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+embedded_items = LRUCache(settings.ELASTICSEARCH_EMBED_CACHE_SIZE)
+
+
+def get_cached_items(paths):
+    """
+    Get the cached serialized data of the items with the given paths, for
+    those whose cached data is current. Returns the cached data by path, and
+    the current version tokens of all the paths.
+    """
+    versions = get_versions(paths)
+    cached = {}
+
+    for path in paths:
+        entry = embedded_items.get(path)
+        if entry is not None and entry[0] == versions[path]:
+            cached[path] = entry[1]
+
+    return cached, versions
+
+
+def cache_items(data_by_path, versions):
+    for path, data in data_by_path.items():
+        embedded_items.set(path, (versions[path], data))
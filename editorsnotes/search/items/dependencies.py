@@ -0,0 +1,122 @@
+"""
+Tracking which indexed items are made stale by a change to another item.
+
+Documents in the items index embed data derived from other items. An item's
+`referenced_by` field is computed from the `references` and `related_topics`
+of every item which points to it, so when those fields change on one item,
+each item added to or dropped from them must be reindexed as well.
+"""
+
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from django.core.urlresolvers import resolve, Resolver404
+
+from pyelasticsearch.exceptions import ElasticHttpNotFoundError
+
+from . import index
+from .cache import invalidate_items
+
+
+def get_dependency_urls(serialized):
+    """
+    Get the URLs of the items whose indexed data depends on the given
+    serialized item.
+    """
+    if not serialized:
+        return set()
+
+    urls = set(serialized.get('references') or [])
+    urls.update(serialized.get('related_topics') or [])
+    return urls
+
+
+def get_invalidated_urls(old_serialized, new_serialized):
+    """
+    Get the URLs of the items which are made stale by an item changing from
+    `old_serialized` to `new_serialized`. Either can be None, for items which
+    were just created or deleted.
+    """
+    return (get_dependency_urls(old_serialized) ^
+            get_dependency_urls(new_serialized))
+
+
+def get_indexed_data(documents):
+    """
+    Get the currently indexed serialized data for a list of
+    (document_type, document_id) pairs in one request. Returns a dict keyed
+    by document ID, which is missing documents that are not indexed.
+    """
+    if not documents:
+        return {}
+
+    docs = [
+        {'_type': document_type.type_label, '_id': doc_id}
+        for document_type, doc_id in documents
+    ]
+
+    try:
+        resp = index.es.multi_get(docs, index=index.name)
+    except ElasticHttpNotFoundError:
+        return {}
+
+    return {
+        doc['_id']: doc['_source']['serialized']
+        for doc in resp['docs']
+        if doc.get('found')
+    }
+
+
+def get_instances_for_urls(urls):
+    """
+    Load the items with the given URLs from the database, with one query for
+    each document type. Returns a dict of lists of items by model. URLs which
+    do not point to an indexed item are ignored.
+    """
+    pks = defaultdict(set)
+
+    for url in urls:
+        try:
+            match = resolve(urlparse(url).path)
+        except Resolver404:
+            continue
+
+        model = getattr(getattr(match.func, 'cls', None), 'queryset', None)
+        model = model.model if model is not None else None
+
+        if model in index.document_types and 'pk' in match.kwargs:
+            pks[model].add(match.kwargs['pk'])
+
+    return {
+        model: list(index.document_types[model].get_queryset()
+                    .filter(pk__in=ids))
+        for model, ids in pks.items()
+    }
+
+
+def reindex_urls(urls, refresh=True):
+    """
+    Reindex the items with the given URLs in a single bulk request. Returns
+    the number of items reindexed.
+    """
+    operations = []
+
+    for model, instances in get_instances_for_urls(urls).items():
+        document_type = index.document_types[model]
+        for doc in document_type.data_from_objects(instances):
+            operations.append(document_type.index_op(doc))
+
+    if operations:
+        index.bulk(operations, refresh=refresh)
+        invalidate_items([doc['url'] for _, doc in operations])
+
+    return len(operations)
+
+
+def update_dependents(old_serialized, new_serialized, exclude=()):
+    """
+    Reindex the items made stale by an item changing from `old_serialized` to
+    `new_serialized`, other than those whose URLs are in `exclude`.
+    """
+    urls = get_invalidated_urls(old_serialized, new_serialized)
+    return reindex_urls(urls - set(exclude))
@@ -3,14 +3,15 @@ Functions for the items index.
 """
 
 from collections import OrderedDict
+from functools import lru_cache
 from itertools import chain
+import re
 from urllib.parse import urlparse
 
-from elasticsearch_dsl import F
-
-from django.core.urlresolvers import resolve
+from django.core.urlresolvers import resolve, reverse
 
 from . import index
+from .cache import cache_items, get_cached_items
 from ..utils import clean_query_string, make_dummy_request
 
 
@@ -24,29 +25,62 @@ def data_for_object(obj):
         index=index.name, doc_type=doc_type.type_label, id=obj.id)
 
 
-def get_referencing_items(item_url):
+# The detail routes of indexed items, and the names of their URL arguments.
+ITEM_ROUTES = (
+    ('api:notes-detail', ('project_slug', 'pk')),
+    ('api:topics-detail', ('project_slug', 'pk')),
+    ('api:documents-detail', ('project_slug', 'pk')),
+    ('api:transcripts-detail', ('project_slug', 'document_id')),
+    ('api:projects-detail', ('project_slug',)),
+)
+
+
+@lru_cache()
+def get_item_url_patterns():
     """
-    Get all items which have referenced the given item URL
+    Compile a regular expression for the path of each indexed item's detail
+    route, along with the name of the item's document type. Matching these is
+    much cheaper than Django's full URL resolution.
     """
+    patterns = []
 
-    if item_url.startswith('/'):
-        item_url = make_dummy_request().build_absolute_uri(item_url)
+    for url_name, arg_names in ITEM_ROUTES:
+        # Placeholders must be digits to be accepted by any argument's regex
+        placeholders = {
+            name: '9876543210{}'.format(i)
+            for i, name in enumerate(arg_names)
+        }
+        url = reverse(url_name, kwargs=placeholders)
+        view_class = resolve(url).func.cls
+        doc_type = view_class.queryset.model._meta.verbose_name
 
-    query_filter = F('term', **{'serialized.references': item_url})
+        path = re.escape(url)
+        for name, placeholder in placeholders.items():
+            path = path.replace(placeholder, '(?P<{}>[^/]+)'.format(name))
 
-    if 'topic' in item_url:
-        query_filter = query_filter | (
-            F('term', **{'serialized.related_topic.url': item_url}))
+        patterns.append((re.compile('^' + path + '$'), doc_type))
 
-    query = index.make_search()\
-        .filter(query_filter)\
-        .fields(['url'])
+    return patterns
 
-    return [(result.url[0]) for result in query.execute().hits]
+
+@lru_cache(maxsize=10000)
+def get_doc_type_for_path(path):
+    "Get the name of the document type of the item at a URL path."
+    for pattern, doc_type in get_item_url_patterns():
+        if pattern.match(path):
+            return doc_type
+
+    # Fall back to resolving the path.
+    model = resolve(path).func.cls.queryset.model
+    return model._meta.verbose_name
 
 
 def get_data_for_urls(item_urls):
-    docs = []
+    """
+    Get the indexed serialized data of the items with the given URLs, in a
+    dict ordered by URL. Data still current in the embedded items cache is
+    served from there; the rest is fetched with one multi_get request.
+    """
     ret = OrderedDict()
 
     if not item_urls:
@@ -55,24 +89,33 @@ def get_data_for_urls(item_urls):
     item_urls = list(item_urls)
     item_urls.sort()
 
-    request = make_dummy_request()
+    paths = {url: urlparse(url).path for url in item_urls}
+    cached, versions = get_cached_items(set(paths.values()))
 
-    for url in item_urls:
-        path = urlparse(url).path
-        match = resolve(path)
-        model = match.func.cls.queryset.model
+    to_fetch = sorted({path for path in paths.values() if path not in cached})
+    fetched = {}
+
+    if to_fetch:
+        request = make_dummy_request()
+        docs = [
+            {
+                '_type': get_doc_type_for_path(path),
+                '_id': request.build_absolute_uri(path)
+            }
+            for path in to_fetch
+        ]
+
+        resp = index.es.multi_get(docs, index=index.name)
 
-        doc_type = model._meta.verbose_name
-        docs.append({
-            '_type': doc_type,
-            '_id': request.build_absolute_uri(path)
-        })
+        for path, doc in zip(to_fetch, resp['docs']):
+            if doc['found']:
+                fetched[path] = doc['_source']['serialized']
 
-    resp = index.es.multi_get(docs, index=index.name)
+        cache_items(fetched, versions)
 
-    for i, item_url in enumerate(item_urls):
-        doc = resp['docs'][i]
-        ret[item_url] = doc['_source']['serialized'] if doc['found'] else None
+    for url in item_urls:
+        path = paths[url]
+        ret[url] = cached.get(path, fetched.get(path))
 
     return ret
 
@@ -10,6 +10,8 @@ def base_serialized_field():
     mapping.field('last_updated', Date())
     mapping.field('created', Date())
     mapping.field('updaters', String(index='not_analyzed'))
+    mapping.field('status', String(index='not_analyzed'))
+    mapping.field('assigned_users', String(index='not_analyzed'))
 
     # URL references
     mapping.field('project', String(index='not_analyzed'))
@@ -26,6 +28,9 @@ class BaseDocType(DocType):
     pk = String(index='not_analyzed')
     display_title = String(search_analyzer='analyzer_shingle',
                            index_analyzer='analyzer_shingle')
+    autocomplete = String(search_analyzer='analyzer_autocomplete_search',
+                          index_analyzer='analyzer_autocomplete',
+                          multi=True)
 
 
 class NoteDocType(BaseDocType):
@@ -0,0 +1,190 @@
+"""
+Rebuilding the items index with a pool of worker processes.
+
+Each document type's primary key space is split into ranges. Workers
+serialize the objects in a range and send them to Elasticsearch through the
+bulk API themselves, so serialization and indexing both happen concurrently.
+
+Ranges finish out of order, so progress is reported as the end of the longest
+run of completed ranges from the start of each type.
+"""
+
+from collections import OrderedDict
+from multiprocessing import Pool
+
+import requests
+
+from django.db import connections
+from django.db.models import Max, Min
+
+from ..index import RateLimiter, encode_bulk_body, send_bulk_request
+from . import index
+
+
+# Set in each worker process by `init_worker`.
+throttle = None
+
+
+def close_connections():
+    """
+    Close database connections so that they are not shared between processes.
+    Django will open new ones when they are next needed.
+    """
+    for connection in connections.all():
+        connection.close()
+
+
+def init_worker(docs_per_second=None, bytes_per_second=None):
+    global throttle
+
+    close_connections()
+
+    # Don't reuse HTTP connections to Elasticsearch opened by the parent.
+    index.es.session = requests.session()
+
+    if docs_per_second or bytes_per_second:
+        throttle = RateLimiter(docs_per_second, bytes_per_second)
+
+
+def get_pk_ranges(model, range_size, start_after=None):
+    """
+    Split the primary keys of a model's table (after `start_after`, if given)
+    into [start, end) ranges.
+    """
+    qs = model.objects.all()
+    if start_after is not None:
+        qs = qs.filter(pk__gt=start_after)
+
+    bounds = qs.aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+
+    if bounds['min_pk'] is None:
+        return []
+
+    return [
+        (start, start + range_size)
+        for start in range(bounds['min_pk'], bounds['max_pk'] + 1, range_size)
+    ]
+
+
+class RangeProgress(object):
+    """
+    Tracks which of a list of [start, end) ranges have finished, in order to
+    report the primary key up to which every range has finished.
+    """
+    def __init__(self, ranges):
+        self.pending = OrderedDict(ranges)
+        self.finished = set()
+
+    def finish(self, start):
+        """
+        Mark the range beginning at `start` as finished. Returns the last
+        primary key of the longest run of finished ranges from the start, or
+        None if that hasn't changed.
+        """
+        self.finished.add(start)
+        last_pk = None
+        while self.pending and next(iter(self.pending)) in self.finished:
+            _, end = self.pending.popitem(last=False)
+            last_pk = end - 1
+        return last_pk
+
+
+def index_pk_range(task):
+    """
+    Serialize and bulk index all objects of one document type within a range
+    of primary keys. Returns the number of documents and bytes sent.
+    """
+    type_label, index_name, start, end, chunk_size = task
+    document_type = index\
+        .get_document_type_by_label(type_label)\
+        .for_index(index_name)
+
+    qs = document_type.model.objects.filter(pk__gte=start, pk__lt=end)
+
+    doc_count = 0
+    byte_count = 0
+
+    for batch in document_type.iter_batches(qs, chunk_size):
+        body = encode_bulk_body(index.es, (
+            document_type.index_op(doc)
+            for doc in document_type.data_from_objects(batch)))
+        send_bulk_request(index.es, index_name, body)
+        body_size = len(body.encode('utf-8'))
+        doc_count += len(batch)
+        byte_count += body_size
+        if throttle is not None:
+            throttle.wait(len(batch), body_size)
+
+    return type_label, start, doc_count, byte_count
+
+
+def rebuild_parallel(document_types, workers, index_name=None,
+                     range_size=3000, chunk_size=300, start_after=None,
+                     on_progress=None, docs_per_second=None,
+                     bytes_per_second=None):
+    """
+    Index all objects of the given document types using a pool of `workers`
+    processes, into `index_name` (by default, the items index's alias).
+    Returns an OrderedDict of [doc count, byte count] by type label.
+
+    `start_after` may be a dict of primary keys by type label to resume
+    after. `on_progress`, if given, is called with a type label and the
+    primary key up to which that type has been completely indexed. Rate
+    limits are shared evenly between the workers.
+    """
+    tasks = []
+    totals = OrderedDict()
+    progress = {}
+    start_after = start_after or {}
+
+    for document_type in document_types:
+        type_label = document_type.type_label
+        ranges = get_pk_ranges(document_type.model, range_size,
+                               start_after.get(type_label))
+        totals[type_label] = [0, 0]
+        progress[type_label] = RangeProgress(ranges)
+        tasks += [
+            (type_label, index_name or index.name, start, end, chunk_size)
+            for start, end in ranges
+        ]
+
+    close_connections()
+
+    pool = Pool(workers, initializer=init_worker, initargs=(
+        docs_per_second and docs_per_second / workers,
+        bytes_per_second and bytes_per_second / workers))
+
+    try:
+        for type_label, start, doc_count, byte_count in \
+                pool.imap_unordered(index_pk_range, tasks):
+            totals[type_label][0] += doc_count
+            totals[type_label][1] += byte_count
+
+            last_pk = progress[type_label].finish(start)
+            if last_pk is not None and on_progress is not None:
+                on_progress(type_label, last_pk)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    return totals
+
+
+def format_summary(totals, elapsed):
+    "Return lines describing the throughput of an index rebuild."
+    lines = []
+
+    total_docs = sum(doc_count for doc_count, _ in totals.values())
+    total_bytes = sum(byte_count for _, byte_count in totals.values())
+
+    for type_label, (doc_count, byte_count) in totals.items():
+        lines.append('{:>12}: {:>10,} documents, {:>10.1f} MB'.format(
+            type_label, doc_count, byte_count / 1024 / 1024))
+
+    lines.append('Indexed {:,} documents ({:.1f} MB) in {:.1f}s: '
+                 '{:.1f} documents/s, {:.2f} MB/s'.format(
+                     total_docs, total_bytes / 1024 / 1024, elapsed,
+                     total_docs / elapsed if elapsed else 0,
+                     total_bytes / 1024 / 1024 / elapsed if elapsed else 0))
+
+    return lines
@@ -1,13 +1,14 @@
-from collections import OrderedDict
-import json
+import copy
 
 from pyelasticsearch.exceptions import ElasticHttpNotFoundError
-from rest_framework.renderers import JSONRenderer
 
 from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
 
-from ..utils import make_dummy_request
+from ..index import encode_bulk_body, scan_search, send_bulk_request
+from ..utils import make_dummy_request, to_primitive
 from . import mappings
+from .cache import invalidate_items
 
 
 DEFINED_TYPES = (
@@ -58,6 +59,57 @@ class DocumentTypeConfig(object):
 
         self.request = make_dummy_request()
 
+    def for_index(self, index_name):
+        """
+        Return a copy of this document type which reads from and writes to
+        another index, e.g. a physical index that is being rebuilt.
+        """
+        document_type = copy.copy(self)
+        document_type.index_name = index_name
+        return document_type
+
+    def has_field(self, field_name):
+        try:
+            self.model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return False
+        return True
+
+    @property
+    def tracks_updates(self):
+        "Whether this type's model records when each object was last updated."
+        return self.has_field('last_updated')
+
+    def get_queryset(self, qs=None):
+        """
+        Return a queryset (by default, of every object of this type) which
+        loads the related objects needed to serialize each object up front.
+        """
+        qs = qs if qs is not None else self.model.objects.all()
+
+        if self.has_field('project'):
+            qs = qs.select_related('project')
+        if self.has_field('document'):
+            qs = qs.select_related('document__project')
+        if self.has_field('related_topics'):
+            qs = qs.prefetch_related('related_topics__topic__project')
+        if self.has_field('assigned_users'):
+            qs = qs.prefetch_related('assigned_users')
+
+        return qs
+
+    def prefetch_batch(self, objects):
+        """
+        Look up the updaters and referencing items of a batch of objects with
+        one query each, rather than once for every object serialized.
+        """
+        if not objects:
+            return
+        if hasattr(self.model, 'prefetch_updaters'):
+            self.model.prefetch_updaters(objects)
+        if hasattr(self.model, 'prefetch_referencing_items'):
+            self.model.prefetch_referencing_items(objects)
+
     @property
     def type_label(self):
         return self.doctype._doc_type.name
@@ -84,8 +136,7 @@ class DocumentTypeConfig(object):
 
     def data_from_object(self, obj):
         serializer = self.serializer(obj, context={'request': self.request})
-        json_data = JSONRenderer().render(serializer.data)
-        serialized = json.loads(json_data.decode('utf-8'), object_pairs_hook=OrderedDict)
+        serialized = to_primitive(serializer.data)
 
         # All items' ES IDs will be the URLs. However, their PKs from the
         # database will also be stored for convenience.
@@ -94,11 +145,47 @@ class DocumentTypeConfig(object):
             'pk': obj.pk,
             'url': url,
             'serialized': serialized,
-            'display_title': obj.as_text()
+            'display_title': obj.as_text(),
+            'autocomplete': self.get_autocomplete_terms(obj)
         }
 
         return data
 
+    def get_autocomplete_terms(self, obj):
+        "Return the names an item can be found by when autocompleting."
+        return [obj.as_text()] + list(getattr(obj, 'alternate_names', None)
+                                      or [])
+
+    def data_from_objects(self, objects):
+        "Serialize a batch of objects, loaded with `get_queryset`."
+        objects = list(objects)
+        self.prefetch_batch(objects)
+        return [self.data_from_object(obj) for obj in objects]
+
+    def document_id(self, instance):
+        "Return the ID (a URL) under which an instance is indexed."
+        return self.request.build_absolute_uri(instance.get_absolute_url())
+
+    def index_op(self, doc):
+        "Return a bulk API operation to index a serialized document."
+        return ({
+            'index': {
+                '_index': self.index_name,
+                '_type': self.type_label,
+                '_id': doc['url']
+            }
+        }, doc)
+
+    def remove_op(self, doc_id):
+        "Return a bulk API operation to remove the document with this ID."
+        return ({
+            'delete': {
+                '_index': self.index_name,
+                '_type': self.type_label,
+                '_id': doc_id
+            }
+        }, None)
+
     def index(self, instance):
         doc = self.data_from_object(instance)
         self.es.index(**self.make_type_kwargs({
@@ -106,6 +193,8 @@ class DocumentTypeConfig(object):
             'id': doc['url'],
             'refresh': True
         }))
+        invalidate_items([doc['url']])
+        return doc
 
     def update(self, instance):
         doc = self.data_from_object(instance)
@@ -114,25 +203,98 @@ class DocumentTypeConfig(object):
             'id': doc['url'],
             'refresh': True
         }))
+        invalidate_items([doc['url']])
+        return doc
 
     def remove(self, instance):
-        doc_id = self.request.build_absolute_uri(instance.get_absolute_url())
+        doc_id = self.document_id(instance)
         self.es.delete(**self.make_type_kwargs({
             'id': doc_id,
             'refresh': True
         }))
+        invalidate_items([doc_id])
+
+    def iter_batches(self, qs=None, chunk_size=300, start_after=None):
+        """
+        Yield lists of objects from a queryset (by default, every object of
+        this type) in primary key order.
 
-    def update_all(self, qs=None, chunk_size=300):
-        i = 0
-        _qs = qs or self.model.objects.all()
-        self.clear()
+        Batches are fetched by filtering on the last primary key seen rather
+        than with offsets, so every query is an index range scan and rows
+        edited while iterating are neither skipped nor repeated. Iteration
+        begins after the primary key `start_after`, if given.
+        """
+        _qs = self.get_queryset(qs).order_by('pk')
+        last_pk = start_after
 
-        # Break up qs into chunks & bulk index each
         while True:
-            chunk = _qs[i:i + chunk_size]
-            if not chunk:
+            batch_qs = _qs if last_pk is None else _qs.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:chunk_size])
+            if not batch:
                 break
-            data = [self.data_from_object(obj) for obj in chunk]
-            self.es.bulk_index(self.index_name, self.type_label, data,
-                               id_field='url')
-            i += chunk_size
+            yield batch
+            last_pk = batch[-1].pk
+
+    def update_all(self, qs=None, chunk_size=300, clear=True,
+                   start_after=None, on_batch=None, throttle=None):
+        """
+        Bulk index all objects in a queryset (by default, every object of this
+        type). Returns the number of documents and bytes that were sent.
+
+        To resume an interrupted run, pass the last primary key that was
+        indexed as `start_after`. `on_batch`, if given, is called with the
+        last primary key of each batch once it has been indexed. `throttle`
+        may be a RateLimiter to slow down indexing with.
+        """
+        doc_count = 0
+        byte_count = 0
+
+        if clear and start_after is None:
+            self.clear()
+
+        for batch in self.iter_batches(qs, chunk_size, start_after):
+            body = encode_bulk_body(self.es, (
+                self.index_op(doc) for doc in self.data_from_objects(batch)))
+            send_bulk_request(self.es, self.index_name, body)
+            body_size = len(body.encode('utf-8'))
+            doc_count += len(batch)
+            byte_count += body_size
+            if throttle is not None:
+                throttle.wait(len(batch), body_size)
+            if on_batch is not None:
+                on_batch(batch[-1].pk)
+
+        return doc_count, byte_count
+
+    def update_since(self, since, chunk_size=300, throttle=None):
+        """
+        Index objects which have changed since the given time. Types whose
+        models don't record update times are reindexed completely.
+        """
+        qs = self.model.objects.all()
+        if since is not None and self.tracks_updates:
+            qs = qs.filter(last_updated__gt=since)
+        return self.update_all(qs, chunk_size=chunk_size, clear=False,
+                               throttle=throttle)
+
+    def remove_stale(self, chunk_size=300):
+        """
+        Remove indexed documents whose objects no longer exist in the
+        database. Returns the number of documents removed.
+        """
+        existing_pks = set(self.model.objects.values_list('pk', flat=True))
+        query = {'query': {'match_all': {}}, '_source': ['pk']}
+
+        stale_ids = [
+            hit['_id'] for hit in
+            scan_search(self.es, self.index_name, query, self.type_label)
+            if int(hit['_source']['pk']) not in existing_pks
+        ]
+
+        for i in range(0, len(stale_ids), chunk_size):
+            body = encode_bulk_body(self.es, (
+                self.remove_op(doc_id)
+                for doc_id in stale_ids[i:i + chunk_size]))
+            send_bulk_request(self.es, self.index_name, body)
+
+        return len(stale_ids)
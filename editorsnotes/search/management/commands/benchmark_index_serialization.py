@@ -0,0 +1,80 @@
+from collections import OrderedDict
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from ... import items_index
+from ...utils import to_primitive
+
+
+def render_and_parse(data):
+    "The previous conversion: render to JSON with DRF, then parse it back."
+    json_data = JSONRenderer().render(data)
+    return json.loads(json_data.decode('utf-8'), object_pairs_hook=OrderedDict)
+
+
+class Command(BaseCommand):
+    help = ('Compare the time taken to convert serialized items to primitives '
+            'for indexing by rendering and parsing JSON, and in one pass.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=200,
+            help='Number of objects of each document type to serialize.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Number of times to convert each serialized object.')
+
+    def time_conversion(self, convert, datas, repeat):
+        start = time.time()
+        for _ in range(repeat):
+            for data in datas:
+                convert(data)
+        return time.time() - start
+
+    def handle(self, *args, **options):
+        count = options['count']
+        repeat = options['repeat']
+
+        self.stdout.write('{:>12} {:>6} {:>14} {:>14} {:>14} {:>8}'.format(
+            'type', 'docs', 'serialize ms', 'round trip ms', 'one pass ms',
+            'speedup'))
+
+        for document_type in items_index.document_types.values():
+            objects = list(document_type.model.objects.order_by('pk')[:count])
+            if not objects:
+                continue
+
+            start = time.time()
+            datas = [
+                document_type.serializer(
+                    obj, context={'request': document_type.request}).data
+                for obj in objects
+            ]
+            serialize_time = time.time() - start
+
+            mismatches = sum(
+                1 for data in datas
+                if render_and_parse(data) != to_primitive(data))
+
+            round_trip_time = self.time_conversion(
+                render_and_parse, datas, repeat)
+            one_pass_time = self.time_conversion(to_primitive, datas, repeat)
+
+            conversions = len(datas) * repeat
+            self.stdout.write(
+                '{:>12} {:>6} {:>14.3f} {:>14.3f} {:>14.3f} {:>7.1f}x'.format(
+                    document_type.type_label,
+                    len(datas),
+                    serialize_time * 1000 / len(datas),
+                    round_trip_time * 1000 / conversions,
+                    one_pass_time * 1000 / conversions,
+                    round_trip_time / one_pass_time if one_pass_time else 0))
+
+            if mismatches:
+                self.stderr.write(
+                    '{} "{}" documents differed between the two '
+                    'conversions'.format(mismatches, document_type.type_label))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...queue import process_queue
+
+
+class Command(BaseCommand):
+    help = 'Index queued item changes in Elasticsearch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of queued changes to send in each bulk request.')
+        parser.add_argument(
+            '--forever', action='store_true', default=False,
+            help='Keep polling the queue instead of exiting once it is empty.')
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds to wait between polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_queue(options['batch_size'])
+
+            if processed:
+                self.stdout.write('Indexed {:,} queued changes'.format(
+                    processed))
+                continue
+
+            if not options['forever']:
+                break
+
+            time.sleep(options['interval'])
@@ -1,26 +1,96 @@
-from django.core.management.base import BaseCommand
-from django.db import models
+from collections import OrderedDict
+import time
 
-from editorsnotes.main.models.auth import LogActivity
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ... import activity_index
+from ...activity import parallel
+from ...index import RateLimiter
+from ...items.parallel import format_summary
+from ...models import ReindexCheckpoint
+
+DOC_TYPE = 'activity'
 
-from .. import activity
 
 class Command(BaseCommand):
     help = 'Rebuild elasticsearch activity index'
-    def handle(self, *args, **kwargs):
-        activity_index = activity.index
 
-        activity_index.delete()
-        activity_index.create()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=('Number of processes to serialize and index actions with, '
+                  'each taking a range of primary keys at a time.'))
+        parser.add_argument(
+            '--range-size', type=int, default=10000,
+            help='Size of the primary key ranges given to each worker.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of actions to send in each bulk request.')
+        parser.add_argument(
+            '--resume', action='store_true', default=False,
+            help=('Resume the last rebuild, if it was interrupted, instead of '
+                  'clearing the index and starting over.'))
+        parser.add_argument(
+            '--docs-per-second', type=float,
+            help='Limit the rate at which documents are sent to Elasticsearch.')
+        parser.add_argument(
+            '--bytes-per-second', type=int,
+            help='Limit the rate at which data is sent to Elasticsearch.')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            positions = ReindexCheckpoint.objects.get_positions(
+                activity_index.name)
+            if DOC_TYPE not in positions:
+                raise CommandError('There is no interrupted rebuild to resume.')
+            last_pk = positions[DOC_TYPE]
+        else:
+            activity_index.delete()
+            activity_index.create()
+            ReindexCheckpoint.objects.start(
+                activity_index.name, [DOC_TYPE], timezone.now())
+            last_pk = None
+
+        activity_index.es.update_settings(
+            activity_index.name, {'index': {'refresh_interval': '-1'}})
+
+        qs = parallel.get_queryset()
+        if last_pk is not None:
+            qs = qs.filter(pk__gt=last_pk)
+        self.stdout.write('Indexing {:,} actions'.format(qs.count()))
+
+        def save_position(last_pk):
+            ReindexCheckpoint.objects.set_position(
+                activity_index.name, DOC_TYPE, last_pk)
+
+        start = time.time()
 
-        qs = LogActivity.objects\
-                .select_related('project', 'user', 'content_type')
+        if options['workers'] > 1:
+            totals = parallel.rebuild_parallel(
+                options['workers'],
+                range_size=options['range_size'],
+                chunk_size=options['chunk_size'],
+                start_after=last_pk,
+                on_progress=save_position,
+                docs_per_second=options['docs_per_second'],
+                bytes_per_second=options['bytes_per_second'])
+        else:
+            throttle = None
+            if options['docs_per_second'] or options['bytes_per_second']:
+                throttle = RateLimiter(options['docs_per_second'],
+                                       options['bytes_per_second'])
+            totals = parallel.index_all(
+                chunk_size=options['chunk_size'],
+                start_after=last_pk,
+                on_batch=save_position,
+                throttle=throttle)
 
-        ct = qs.count()
-        self.stdout.write('Indexing {} actions'.format(ct))
+        activity_index.es.update_settings(
+            activity_index.name, {'index': {'refresh_interval': '1s'}})
+        activity_index.es.refresh(activity_index.name)
+        ReindexCheckpoint.objects.finish(activity_index.name)
 
-        i = 0
-        for activity in qs:
-            activity_index.handle_edit(activity, refresh=False)
-            i += 1
-            if (i % 100 == 0): self.stdout.write('{}/{}'.format(i, ct))
+        summary = OrderedDict([(DOC_TYPE, totals)])
+        for line in format_summary(summary, time.time() - start):
+            self.stdout.write(line)
@@ -1,15 +1,233 @@
-from django.core.management.base import BaseCommand
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from ... import items_index
+from ...index import RateLimiter
+from ...items.cache import invalidate_all_items
+from ...items.parallel import format_summary, rebuild_parallel
+from ...models import IndexWatermark, ReindexCheckpoint
+
+
+def parse_timestamp(value):
+    timestamp = parse_datetime(value)
+
+    if timestamp is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError('Could not parse timestamp "{}"'.format(value))
+        timestamp = datetime.combine(date, datetime.min.time())
+
+    if settings.USE_TZ and timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+
+    return timestamp
+
 
 class Command(BaseCommand):
     help = 'Rebuild elasticsearch index'
-    def handle(self, *args, **kwargs):
-        items_index.delete()
-        items_index.initialize()
 
-        for doc_type in list(items_index.document_types.values()):
-            ct = doc_type.model.objects.count()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=('Number of processes to serialize and index documents with. '
+                  'Each document type is split into ranges of primary keys '
+                  'which are indexed concurrently.'))
+        parser.add_argument(
+            '--range-size', type=int, default=3000,
+            help='Size of the primary key ranges given to each worker.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=300,
+            help='Number of documents to send in each bulk request.')
+        parser.add_argument(
+            '--since', type=parse_timestamp,
+            help=('Instead of rebuilding the whole index, only reindex items '
+                  'updated after this date or time, and remove documents '
+                  'for items which have been deleted.'))
+        parser.add_argument(
+            '--incremental', action='store_true', default=False,
+            help=('Like --since, but use the time of the last successful run '
+                  'of this command for each document type.'))
+        parser.add_argument(
+            '--resume', action='store_true', default=False,
+            help=('Resume the last rebuild, if it was interrupted, after the '
+                  'last batch of each document type that was indexed.'))
+        parser.add_argument(
+            '--docs-per-second', type=float,
+            help='Limit the rate at which documents are sent to Elasticsearch.')
+        parser.add_argument(
+            '--bytes-per-second', type=int,
+            help='Limit the rate at which data is sent to Elasticsearch.')
+
+    def handle(self, *args, **options):
+        if options['docs_per_second'] or options['bytes_per_second']:
+            self.throttle = RateLimiter(options['docs_per_second'],
+                                        options['bytes_per_second'])
+        else:
+            self.throttle = None
+
+        if options['since'] or options['incremental']:
+            self.update_incremental(**options)
+        else:
+            self.rebuild(**options)
+
+    def discard_rebuild(self, index_name):
+        """
+        Forget an interrupted rebuild, deleting the physical index it was
+        building unless the items index's alias points to it.
+        """
+        if (items_index.exists(index_name) and
+                index_name not in items_index.get_aliased_indices()):
+            items_index.es.delete_index(index_name)
+            self.stdout.write(
+                'Deleted the index of an interrupted rebuild, "{}"'.format(
+                    index_name))
+        ReindexCheckpoint.objects.finish(index_name)
+
+    def start_rebuild(self, resume):
+        """
+        Return the name of the physical index to build, the time the rebuild
+        began, and the primary keys already indexed for each document type.
+        """
+        if resume:
+            index_name = ReindexCheckpoint.objects.get_unfinished(
+                items_index.name + '-')
+            if index_name is None:
+                raise CommandError('There is no interrupted rebuild to resume.')
+            if not items_index.exists(index_name):
+                self.discard_rebuild(index_name)
+                raise CommandError(
+                    'The index "{}" no longer exists.'.format(index_name))
+            started = ReindexCheckpoint.objects.get_started(index_name)
+            positions = ReindexCheckpoint.objects.get_positions(index_name)
+            self.stdout.write('Resuming rebuild of "{}"'.format(index_name))
+        else:
+            interrupted = ReindexCheckpoint.objects.get_unfinished(
+                items_index.name + '-')
+            if interrupted is not None:
+                self.discard_rebuild(interrupted)
+
+            started = timezone.now()
+            index_name = items_index.create_versioned()
+            positions = {}
+            ReindexCheckpoint.objects.start(
+                index_name, [doc_type.type_label for doc_type in
+                             items_index.document_types.values()], started)
+
+        return index_name, started, positions
+
+    def rebuild(self, workers, range_size, chunk_size, resume,
+                docs_per_second, bytes_per_second, **options):
+        """
+        Build a new physical index in the background, then swap the items
+        index's alias over to it. The old index keeps serving searches and
+        receiving writes until the swap.
+
+        Progress is checkpointed after every batch, so that an interrupted
+        rebuild can be continued with `--resume`.
+        """
+        index_name, started, positions = self.start_rebuild(resume)
+        items_index.es.update_settings(
+            index_name, {'index': {'refresh_interval': '-1'}})
+
+        document_types = [
+            doc_type.for_index(index_name)
+            for doc_type in items_index.document_types.values()
+        ]
+
+        for doc_type in document_types:
+            qs = doc_type.model.objects.all()
+            last_pk = positions.get(doc_type.type_label)
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
             self.stdout.write('Creating {:,} "{}" documents'.format(
-                ct, doc_type.type_label))
-            doc_type.update_all()
+                qs.count(), doc_type.type_label))
+
+        def save_position(type_label, last_pk):
+            ReindexCheckpoint.objects.set_position(
+                index_name, type_label, last_pk)
+
+        start = time.time()
+
+        if workers > 1:
+            totals = rebuild_parallel(document_types, workers,
+                                      index_name=index_name,
+                                      range_size=range_size,
+                                      chunk_size=chunk_size,
+                                      start_after=positions,
+                                      on_progress=save_position,
+                                      docs_per_second=docs_per_second,
+                                      bytes_per_second=bytes_per_second)
+        else:
+            totals = OrderedDict()
+            for doc_type in document_types:
+                type_label = doc_type.type_label
+                totals[type_label] = doc_type.update_all(
+                    chunk_size=chunk_size, clear=False,
+                    start_after=positions.get(type_label),
+                    on_batch=partial(save_position, type_label),
+                    throttle=self.throttle)
+
+        # Items changed while the new index was being built were written to
+        # the old one. Copy them over before swapping the alias, then once
+        # more afterwards to pick up anything changed in between.
+        caught_up = timezone.now()
+        self.catch_up(document_types, started, chunk_size)
+
+        items_index.es.update_settings(
+            index_name, {'index': {'refresh_interval': '1s'}})
+        items_index.es.refresh(index_name)
+
+        self.stdout.write('Pointing "{}" to "{}"'.format(
+            items_index.name, index_name))
+        items_index.swap_alias(index_name)
+        invalidate_all_items()
+
+        self.catch_up(document_types, caught_up, chunk_size)
+
+        for doc_type in document_types:
+            IndexWatermark.objects.set_timestamp(doc_type.type_label, started)
+
+        ReindexCheckpoint.objects.finish(index_name)
+
+        for line in format_summary(totals, time.time() - start):
+            self.stdout.write(line)
+
+    def catch_up(self, document_types, since, chunk_size):
+        for doc_type in document_types:
+            doc_type.update_since(since, chunk_size=chunk_size,
+                                  throttle=self.throttle)
+            doc_type.remove_stale(chunk_size=chunk_size)
+
+    def update_incremental(self, since, chunk_size, **options):
+        totals = OrderedDict()
+        start = time.time()
+
+        for doc_type in items_index.document_types.values():
+            started = timezone.now()
+            type_since = since or \
+                IndexWatermark.objects.get_timestamp(doc_type.type_label)
+
+            self.stdout.write('Updating "{}" documents changed since {}'.format(
+                doc_type.type_label, type_since or 'the beginning'))
+
+            totals[doc_type.type_label] = doc_type.update_since(
+                type_since, chunk_size=chunk_size, throttle=self.throttle)
+
+            removed = doc_type.remove_stale(chunk_size=chunk_size)
+            if removed:
+                self.stdout.write('Removed {:,} deleted "{}" documents'.format(
+                    removed, doc_type.type_label))
+
+            IndexWatermark.objects.set_timestamp(doc_type.type_label, started)
+
+        invalidate_all_items()
+
+        for line in format_summary(totals, time.time() - start):
+            self.stdout.write(line)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.4 on 2026-10-18 10:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexQueueEntry',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('doc_type', models.CharField(max_length=40)),
+                ('object_id', models.PositiveIntegerField()),
+                ('document_id', models.CharField(help_text='The Elasticsearch ID (URL) of the affected document.', max_length=400)),
+                ('action', models.CharField(choices=[('index', 'index'), ('remove', 'remove')], max_length=10)),
+                ('queued', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
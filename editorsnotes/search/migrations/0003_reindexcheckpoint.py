@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.9.4 on 2026-10-18 14:37
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_indexwatermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReindexCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_name', models.CharField(max_length=100)),
+                ('doc_type', models.CharField(max_length=40)),
+                ('last_pk', models.PositiveIntegerField(blank=True, null=True)),
+                ('started', models.DateTimeField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='reindexcheckpoint',
+            unique_together=set([('index_name', 'doc_type')]),
+        ),
+    ]
@@ -0,0 +1,125 @@
+from django.db import models
+from django.utils import timezone
+
+__all__ = ['IndexQueueEntry', 'IndexWatermark', 'ReindexCheckpoint']
+
+
+INDEX = 'index'
+REMOVE = 'remove'
+
+QUEUE_ACTIONS = (
+    (INDEX, 'index'),
+    (REMOVE, 'remove'),
+)
+
+
+class IndexQueueEntry(models.Model):
+    """
+    A pending write to the items index.
+
+    Entries are created after the transaction that changed an item has been
+    committed, and are consumed in batches by the `process_index_queue`
+    management command.
+    """
+    doc_type = models.CharField(max_length=40)
+    object_id = models.PositiveIntegerField()
+    document_id = models.CharField(
+        max_length=400,
+        help_text='The Elasticsearch ID (URL) of the affected document.')
+    action = models.CharField(max_length=10, choices=QUEUE_ACTIONS)
+    queued = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('id',)
+
+    def __unicode__(self):
+        return '{} {} {}'.format(self.action, self.doc_type, self.object_id)
+
+
+class IndexWatermarkManager(models.Manager):
+    def get_timestamp(self, doc_type):
+        "Return the watermark for a document type, or None if there isn't one"
+        watermark = self.filter(doc_type=doc_type).first()
+        return watermark.timestamp if watermark else None
+
+    def set_timestamp(self, doc_type, timestamp):
+        self.update_or_create(doc_type=doc_type,
+                              defaults={'timestamp': timestamp})
+
+
+class IndexWatermark(models.Model):
+    """
+    The time at which a document type was last fully synchronized with the
+    database. Incremental reindexing only considers rows updated after it.
+    """
+    doc_type = models.CharField(max_length=40, unique=True)
+    timestamp = models.DateTimeField()
+
+    objects = IndexWatermarkManager()
+
+    def __unicode__(self):
+        return '{} ({})'.format(self.doc_type, self.timestamp)
+
+
+class ReindexCheckpointManager(models.Manager):
+    def start(self, index_name, doc_types, started):
+        "Record that a rebuild of the given index and document types began."
+        self.filter(index_name=index_name).delete()
+        self.bulk_create([
+            self.model(index_name=index_name, doc_type=doc_type,
+                       started=started)
+            for doc_type in doc_types
+        ])
+
+    def get_unfinished(self, index_prefix):
+        """
+        Return the name of the most recently checkpointed index whose name
+        starts with `index_prefix`, or None if there isn't one.
+        """
+        checkpoint = self\
+            .filter(index_name__startswith=index_prefix)\
+            .order_by('-updated')\
+            .first()
+        return checkpoint.index_name if checkpoint else None
+
+    def get_started(self, index_name):
+        "Return the time at which a rebuild of an index began."
+        return self\
+            .filter(index_name=index_name)\
+            .aggregate(started=models.Min('started'))['started']
+
+    def get_positions(self, index_name):
+        "Return a dict of the last primary key indexed, by document type."
+        return dict(self
+                    .filter(index_name=index_name)
+                    .values_list('doc_type', 'last_pk'))
+
+    def set_position(self, index_name, doc_type, last_pk):
+        self.filter(index_name=index_name, doc_type=doc_type)\
+            .update(last_pk=last_pk, updated=timezone.now())
+
+    def finish(self, index_name):
+        "Remove the checkpoints of a rebuild which has completed."
+        self.filter(index_name=index_name).delete()
+
+
+class ReindexCheckpoint(models.Model):
+    """
+    The progress of a rebuild of one document type in an index. Checkpoints
+    exist only while a rebuild is running (or after it has been interrupted),
+    and let `--resume` pick up after the last primary key that was indexed.
+    """
+    index_name = models.CharField(max_length=100)
+    doc_type = models.CharField(max_length=40)
+    last_pk = models.PositiveIntegerField(blank=True, null=True)
+    started = models.DateTimeField()
+    updated = models.DateTimeField(auto_now=True)
+
+    objects = ReindexCheckpointManager()
+
+    class Meta:
+        unique_together = ('index_name', 'doc_type')
+
+    def __unicode__(self):
+        return '{}/{} ({})'.format(self.index_name, self.doc_type,
+                                   self.last_pk)
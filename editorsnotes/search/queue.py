@@ -0,0 +1,108 @@
+"""
+Deferred indexing of items.
+
+Rather than writing to Elasticsearch during the request which changed an item,
+changes can be recorded in a queue table once their transaction has committed.
+The queue is drained in batches by the `process_index_queue` management
+command, which sends each batch through the bulk API and refreshes the index
+once per batch. Items made stale by the changes in a batch (see
+`items.dependencies`) are reindexed afterwards in one more bulk request.
+"""
+
+from collections import OrderedDict, defaultdict
+
+from django.db import transaction
+
+from . import items_index
+from .items.cache import invalidate_items
+from .items.dependencies import (
+    get_dependency_urls, get_indexed_data, get_invalidated_urls, reindex_urls)
+from .models import IndexQueueEntry, INDEX, REMOVE
+
+
+def enqueue(document_type, instance, action):
+    """
+    Record that an instance should be (re)indexed or removed from the index
+    once the current transaction (if any) has been committed.
+    """
+    entry = IndexQueueEntry(
+        doc_type=document_type.type_label,
+        object_id=instance.pk,
+        document_id=document_type.document_id(instance),
+        action=action)
+
+    transaction.on_commit(entry.save)
+    return entry
+
+
+def collapse_entries(entries):
+    """
+    Reduce a list of queue entries to the most recent entry for each item.
+    """
+    latest = OrderedDict()
+    for entry in entries:
+        latest[(entry.doc_type, entry.object_id)] = entry
+    return list(latest.values())
+
+
+def get_operations(entries):
+    """
+    Get a list of bulk API operations for the given queue entries, along with
+    the set of URLs of other items made stale by those operations.
+    """
+    operations = []
+    invalidated = set()
+    to_index = defaultdict(set)
+
+    entries = collapse_entries(entries)
+    old_data = get_indexed_data([
+        (items_index.get_document_type_by_label(entry.doc_type),
+         entry.document_id)
+        for entry in entries
+    ])
+
+    for entry in entries:
+        document_type = items_index.get_document_type_by_label(entry.doc_type)
+        if entry.action == REMOVE:
+            operations.append(document_type.remove_op(entry.document_id))
+            invalidated |= get_dependency_urls(
+                old_data.get(entry.document_id))
+        elif entry.action == INDEX:
+            to_index[document_type].add(entry.object_id)
+
+    for document_type, ids in to_index.items():
+        # Items which no longer exist will have had a removal queued after
+        # this entry, so they can be skipped here.
+        objects = document_type.get_queryset().filter(pk__in=ids)
+        for doc in document_type.data_from_objects(objects):
+            operations.append(document_type.index_op(doc))
+            invalidated |= get_invalidated_urls(
+                old_data.get(doc['url']), doc['serialized'])
+
+    invalidated -= {entry.document_id for entry in entries}
+
+    return operations, invalidated
+
+
+def process_queue(batch_size=500):
+    """
+    Index one batch of queued changes. Returns the number of queue entries
+    that were processed.
+    """
+    with transaction.atomic():
+        entries = list(
+            IndexQueueEntry.objects.select_for_update()[:batch_size])
+
+        if not entries:
+            return 0
+
+        operations, invalidated = get_operations(entries)
+        items_index.bulk(operations, refresh=True)
+        invalidate_items([entry.document_id for entry in entries])
+        reindex_urls(invalidated)
+
+        IndexQueueEntry.objects\
+            .filter(id__in=[entry.id for entry in entries])\
+            .delete()
+
+    return len(entries)
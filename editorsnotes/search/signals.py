@@ -1,8 +1,12 @@
 from django.apps import apps as django_apps
-from django.db.models.signals import post_save, post_delete
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 
 from .activity.helpers import handle_activity_edit
+from .items.dependencies import get_indexed_data, update_dependents
+from .models import INDEX, REMOVE
+from .queue import enqueue
 from . import items_index
 
 main = django_apps.get_app_config('main')
@@ -19,10 +23,17 @@ def update_elastic_search_handler(sender, instance, created, **kwargs):
     document_type = items_index.document_types.get(model, None)
 
     if document_type:
-        if created:
-            document_type.index(instance)
+        if settings.ELASTICSEARCH_DEFERRED_INDEXING:
+            enqueue(document_type, instance, INDEX)
+        elif created:
+            doc = document_type.index(instance)
+            update_dependents(None, doc['serialized'], exclude=[doc['url']])
         else:
-            document_type.update(instance)
+            doc_id = document_type.document_id(instance)
+            old_data = get_indexed_data([(document_type, doc_id)])
+            doc = document_type.update(instance)
+            update_dependents(old_data.get(doc_id), doc['serialized'],
+                              exclude=[doc['url']])
 
 
 @receiver(post_delete)
@@ -31,4 +42,49 @@ def delete_es_document_handler(sender, instance, **kwargs):
     document_type = items_index.document_types.get(model, None)
 
     if document_type:
-        document_type.remove(instance)
+        if settings.ELASTICSEARCH_DEFERRED_INDEXING:
+            enqueue(document_type, instance, REMOVE)
+        else:
+            doc_id = document_type.document_id(instance)
+            old_data = get_indexed_data([(document_type, doc_id)])
+            document_type.remove(instance)
+            update_dependents(old_data.get(doc_id), None, exclude=[doc_id])
+
+
+@receiver(post_save, sender=main.get_model('TopicAssignment'))
+@receiver(post_delete, sender=main.get_model('TopicAssignment'))
+def update_topic_assignment_handler(sender, instance, **kwargs):
+    # Assignments are embedded in the `related_topics` of the item they were
+    # made to, so that item must be reindexed. Reindexing it will in turn
+    # reindex the assigned topic (see `update_dependents`).
+    content_object = instance.content_object
+
+    if content_object is not None:
+        update_elastic_search_handler(
+            sender=content_object.__class__, instance=content_object,
+            created=False)
+
+
+@receiver(m2m_changed, sender=main.get_model('Note').assigned_users.through)
+def update_note_assigned_users_handler(sender, instance, action, reverse,
+                                       model, pk_set, **kwargs):
+    # Assigned users are indexed with the note, but changing them does not
+    # save it.
+    if not reverse:
+        notes = [instance]
+    elif action == 'pre_clear':
+        # The notes a user is removed from are unknown once they are cleared
+        instance._cleared_assigned_note_ids = list(
+            model.objects.filter(assigned_users=instance)
+            .values_list('id', flat=True))
+        return
+    elif action == 'post_clear':
+        notes = model.objects.filter(
+            id__in=instance.__dict__.pop('_cleared_assigned_note_ids', []))
+    else:
+        notes = model.objects.filter(id__in=pk_set or [])
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        for note in notes:
+            update_elastic_search_handler(sender=note.__class__, instance=note,
+                                          created=False)
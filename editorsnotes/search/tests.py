@@ -1,11 +1,29 @@
 # -*- coding: utf-8 -*-
 
-from django.test import TransactionTestCase
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+import json
+
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import override_settings
 
 from pyelasticsearch import ElasticHttpError
+from rest_framework.renderers import JSONRenderer
+
+from editorsnotes.auth.models import Project
+from editorsnotes.main.models import Note, Topic
 
 from ..api.tests import ClearContentTypesMixin
-from .items.helpers import perform_query
+from ..api.tests.views import create_topic, flush_es_indexes
+from . import items_index
+from .index import encode_bulk_body, split_bulk_body
+from .items.cache import LRUCache
+from .items.helpers import get_doc_type_for_path, perform_query
+from .models import IndexQueueEntry
+from .queue import process_queue
+from .utils import to_primitive
+
 
 class SearchTestCase(ClearContentTypesMixin, TransactionTestCase):
     def test_escape_special_chars(self):
@@ -18,3 +36,209 @@ class SearchTestCase(ClearContentTypesMixin, TransactionTestCase):
                 perform_query(query)
             except ElasticHttpError:
                 self.fail('Search for query “{}” raised an exception.'.format(query))
+
+
+class IndexQueueTestCase(ClearContentTypesMixin, TransactionTestCase):
+    fixtures = ['projects.json']
+
+    def setUp(self):
+        self.project = Project.objects.get(slug='emma')
+        self.user = self.project.members.all()[0]
+
+    @override_settings(ELASTICSEARCH_DEFERRED_INDEXING=True)
+    def test_deferred_indexing(self):
+        "Saved items should only be indexed once the queue is processed"
+        flush_es_indexes()
+        IndexQueueEntry.objects.all().delete()
+
+        topic = create_topic(user=self.user, project=self.project)
+        topic.save()
+
+        self.assertEqual(
+            IndexQueueEntry.objects.filter(doc_type='topic').count(), 2)
+
+        search = items_index.make_search_for_model(Topic)
+        self.assertEqual(search.count(), 0)
+
+        process_queue()
+
+        self.assertEqual(IndexQueueEntry.objects.count(), 0)
+        self.assertEqual(search.count(), 1)
+
+        topic.delete()
+        process_queue()
+
+        self.assertEqual(search.count(), 0)
+
+
+class IndexAliasTestCase(ClearContentTypesMixin, TransactionTestCase):
+    def test_swap_alias(self):
+        "Swapping the alias should point it to the new index only"
+        flush_es_indexes()
+
+        old_indices = items_index.get_aliased_indices()
+        self.assertEqual(len(old_indices), 1)
+
+        new_index = items_index.create_versioned()
+        items_index.swap_alias(new_index)
+
+        self.assertEqual(items_index.get_aliased_indices(), [new_index])
+        self.assertTrue(items_index.exists())
+
+        server_url, _ = items_index.es.servers.get()
+        resp = items_index.es.session.head(server_url + '/' + old_indices[0])
+        self.assertEqual(resp.status_code, 404)
+
+
+class DocumentTypeBatchTestCase(ClearContentTypesMixin, TransactionTestCase):
+    fixtures = ['projects.json']
+
+    def setUp(self):
+        self.project = Project.objects.get(slug='emma')
+        self.user = self.project.members.all()[0]
+
+    def test_iter_batches(self):
+        "Objects should be batched by primary key, resuming after a cursor"
+        topics = [
+            create_topic(user=self.user, project=self.project,
+                         preferred_name='Topic {}'.format(i))
+            for i in range(5)
+        ]
+        document_type = items_index.document_types[Topic]
+
+        batches = list(document_type.iter_batches(chunk_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(
+            [topic.pk for batch in batches for topic in batch],
+            [topic.pk for topic in topics])
+
+        resumed = list(document_type.iter_batches(
+            chunk_size=2, start_after=topics[2].pk))
+        self.assertEqual(
+            [topic.pk for batch in resumed for topic in batch],
+            [topic.pk for topic in topics[3:]])
+
+    def test_data_from_objects(self):
+        "Serializing a batch should give the same data as one at a time"
+        flush_es_indexes()
+        for i in range(3):
+            create_topic(user=self.user, project=self.project,
+                         preferred_name='Topic {}'.format(i))
+        document_type = items_index.document_types[Topic]
+
+        batch = list(document_type.get_queryset().order_by('pk'))
+        self.assertEqual(
+            document_type.data_from_objects(batch),
+            [document_type.data_from_object(topic)
+             for topic in Topic.objects.order_by('pk')])
+
+
+class DependentReindexTestCase(ClearContentTypesMixin, TransactionTestCase):
+    fixtures = ['projects.json']
+
+    def setUp(self):
+        self.project = Project.objects.get(slug='emma')
+        self.user = self.project.members.all()[0]
+
+    def get_referenced_by(self, instance):
+        document_type = items_index.document_types[instance.__class__]
+        resp = items_index.es.get(items_index.name, document_type.type_label,
+                                  document_type.document_id(instance))
+        return resp['_source']['serialized']['referenced_by']
+
+    def test_topic_assignment_reindexes_topic(self):
+        "Assigning a topic should reindex the topic's referencing items"
+        flush_es_indexes()
+
+        topic = create_topic(user=self.user, project=self.project)
+        note = Note.objects.create(
+            title='Is testing good?', markup='Let\'s find out.', status='1',
+            project=self.project, creator=self.user, last_updater=self.user)
+        note_url = items_index.document_types[Note].document_id(note)
+
+        self.assertEqual(self.get_referenced_by(topic), [])
+
+        assignment = note.related_topics.create(topic=topic, creator=self.user)
+        self.assertEqual(self.get_referenced_by(topic), [note_url])
+
+        assignment.delete()
+        self.assertEqual(self.get_referenced_by(topic), [])
+
+    def test_markup_reference_reindexes_topic(self):
+        "Referencing a topic in markup should reindex the topic"
+        flush_es_indexes()
+
+        topic = create_topic(user=self.user, project=self.project)
+        note = Note.objects.create(
+            title='Is testing good?', markup='Let\'s find out.', status='1',
+            project=self.project, creator=self.user, last_updater=self.user)
+        note_url = items_index.document_types[Note].document_id(note)
+
+        self.assertEqual(self.get_referenced_by(topic), [])
+
+        note.markup = 'This is about @@t{}.'.format(topic.id)
+        note.save()
+        self.assertEqual(self.get_referenced_by(topic), [note_url])
+
+        note.markup = 'This is about nothing.'
+        note.save()
+        self.assertEqual(self.get_referenced_by(topic), [])
+
+
+class BulkBodyTestCase(SimpleTestCase):
+    def test_split_bulk_body(self):
+        "Bulk bodies should be split into one chunk per operation"
+        operations = [
+            ({'index': {'_id': 'a'}}, {'title': 'First\nline'}),
+            ({'delete': {'_id': 'b'}}, None),
+            ({'index': {'_id': 'c'}}, {'title': 'Third'}),
+        ]
+        body = encode_bulk_body(items_index.es, operations)
+
+        chunks = split_bulk_body(body)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks), body)
+        self.assertEqual(chunks[1].count('\n'), 1)
+        self.assertEqual(chunks[2], encode_bulk_body(items_index.es,
+                                                     operations[2:]))
+
+
+class ToPrimitiveTestCase(SimpleTestCase):
+    def test_matches_json_round_trip(self):
+        "Converting to primitives should match rendering and parsing JSON"
+        data = OrderedDict([
+            ('title', 'Is testing good?'),
+            ('last_updated', datetime(2016, 3, 1, 12, 30, 15, 123456)),
+            ('score', Decimal('1.5')),
+            ('related_topics', ('a', 'b')),
+            ('counts', {1: [True, None]}),
+        ])
+        round_trip = json.loads(JSONRenderer().render(data).decode('utf-8'),
+                                object_pairs_hook=OrderedDict)
+
+        self.assertEqual(to_primitive(data), round_trip)
+        self.assertEqual(list(to_primitive(data).keys()), list(data.keys()))
+
+
+class EmbeddedItemsCacheTestCase(SimpleTestCase):
+    def test_lru_cache(self):
+        "The least recently used entries should be discarded first"
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.get('b'), None)
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_doc_type_for_path(self):
+        "Item paths should be matched to their document types"
+        self.assertEqual(
+            get_doc_type_for_path('/projects/emma/notes/12/'), 'note')
+        self.assertEqual(
+            get_doc_type_for_path('/projects/emma/documents/3/transcript/'),
+            'transcript')
+        self.assertEqual(
+            get_doc_type_for_path('/projects/emma/'), 'project')
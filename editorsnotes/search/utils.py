@@ -1,12 +1,20 @@
+from collections import OrderedDict
+import json
 import re
 from urllib.parse import urlparse
 
 from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
 
+from rest_framework.utils.encoders import JSONEncoder
+
 
 SPECIAL_CHARS = re.compile('([+\-&|!(){}\[\]^~*?:/])')
 
+PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
+encoder = JSONEncoder()
+
 
 def clean_query_string(query):
     # Strip any backslashes
@@ -33,3 +41,27 @@ def make_dummy_request():
     })
 
     return request
+
+
+def to_primitive(value):
+    """
+    Convert serializer output to JSON-compatible primitives (dicts, lists,
+    strings, numbers, and None) in one pass.
+
+    The result is the same as rendering the value with DRF's JSONRenderer and
+    parsing it back with `object_pairs_hook=OrderedDict`, without producing
+    and parsing the intermediate JSON string.
+    """
+    if isinstance(value, PRIMITIVE_TYPES):
+        return value
+
+    if isinstance(value, dict):
+        return OrderedDict(
+            (key if isinstance(key, str) else json.dumps(key),
+             to_primitive(item))
+            for key, item in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return [to_primitive(item) for item in value]
+
+    return to_primitive(encoder.default(value))
@@ -129,6 +129,48 @@ STATICFILES_FINDERS = (
     'django.contrib.staticfiles.finders.AppDirectoriesFinder',
 )
 
+# How to render markup: "http" to use the markup renderer server at
+# EDITORSNOTES_MARKUP_RENDERER_URL, or "python" to render it in process, which
+# requires the CommonMark package.
+EDITORSNOTES_MARKUP_RENDERER = 'http'
+
+# Connect and read timeouts for requests to the markup renderer server, in
+# seconds, and how many times to retry requests that fail to connect or get
+# a 502, 503 or 504 response.
+EDITORSNOTES_MARKUP_RENDERER_TIMEOUT = (3.05, 30)
+EDITORSNOTES_MARKUP_RENDERER_MAX_RETRIES = 2
+
+# If true, items referenced in markup are found by scanning it for references
+# locally, so that rendering takes one request to the markup renderer instead
+# of two.
+EDITORSNOTES_MARKUP_PRESCAN = True
+
+# How long to cache rendered markup, in seconds. Renderings are cached by the
+# markup and the data of the items it references, but not by the version of
+# the markup renderer, so renderings by an older version of it are served
+# until they expire.
+EDITORSNOTES_MARKUP_RENDER_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# The number of keep-alive connections to the markup renderer server to keep
+# open in each process.
+EDITORSNOTES_MARKUP_RENDERER_POOL_SIZE = 10
+
+# If true, changes to items will be queued and indexed in Elasticsearch by the
+# `process_index_queue` management command instead of during the request.
+ELASTICSEARCH_DEFERRED_INDEXING = False
+
+# The number of indexed items embedded in API responses to keep in memory in
+# each process.
+ELASTICSEARCH_EMBED_CACHE_SIZE = 2000
+
+# How long to cache the results of searches for a project's items, in seconds.
+# Cached results are discarded as soon as any of the project's items change.
+ELASTICSEARCH_LIST_CACHE_TIMEOUT = 60 * 60
+
+# How long to cache the most recently updated items shown when browsing, in
+# seconds. They are also discarded as soon as any item changes.
+ELASTICSEARCH_BROWSE_CACHE_TIMEOUT = 5 * 60
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',